@@ -4,18 +4,26 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import os
+import re
 import sys
 import time
 import json
+import heapq
+import asyncio
+import bisect
 import matplotlib.pyplot as plt
 import plotly.express as px
 import plotly.graph_objects as go
 import networkx as nx
 from datetime import datetime, timedelta
-import subprocess
+from collections import defaultdict, deque
+from dataclasses import dataclass
+from functools import lru_cache
+from operator import itemgetter
 import xml.etree.ElementTree as ET
 import folium
 from streamlit_folium import folium_static
+import streamlit.components.v1 as components
 from folium.plugins import MarkerCluster
 import tempfile
 import shutil
@@ -38,9 +46,79 @@ st.set_page_config(
 # Constants and helper functions
 APP_VERSION = "1.1.0"
 DATE_FORMAT = "%Y-%m-%d"
+MAX_LOG_CHARS = 16384  # Trailing characters of solver output shown in the optimization log
+LOG_FLUSH_INTERVAL = 0.2  # Seconds between optimization log refreshes
+SOLVER_POLL_TIMEOUT = 0.1  # Seconds to wait for solver output before refreshing the log
+SOLVER_READ_SIZE = 65536  # Bytes read from the solver pipe at a time
 
+# Solver output markers and the (progress, status message) each one moves to;
+# "Iteration <n>" lines are handled separately from the captured number
+SOLVER_PROGRESS_STEPS = {
+    "Loading problem": (10, "Loading problem data..."),
+    "Building models": (20, "Building optimization models..."),
+    "Solving scheduling model": (30, "Solving scheduling model..."),
+    "Scheduling model solved successfully": (60, "Scheduling model solved. Processing traffic..."),
+    "Traffic flow model solved successfully": (80, "Traffic model solved. Finalizing results..."),
+    "Results written to": (100, "Optimization completed successfully!")
+}
+SOLVER_PROGRESS_RE = re.compile(r"Iteration\s+(\d+)|" + "|".join(map(re.escape, SOLVER_PROGRESS_STEPS)))
+
+# Static help text shown in the "Understanding ..." expanders
+_DETOUR_HELP_MD = """
+### Detour Route Concepts
+
+Detour routes provide alternative paths for trains when a track is closed for maintenance.
+
+#### Key Components:
+
+1. **Closed Track** - The link that will be unavailable during maintenance
+2. **Detour Path** - The series of nodes and links that form the alternative route
+3. **Train Types** - Which types of trains can use this detour route
+
+#### Considerations for Detour Routes:
+
+- **Length** - Longer detours increase travel time and operational costs
+- **Capacity** - Detour tracks must be able to handle the additional traffic
+- **Electrification** - Some train types may require electrified tracks
+- **Clearance** - Freight trains have specific clearance requirements
+
+The system can calculate optimal detours automatically or you can specify them manually.
+"""
+
+_RULES_HELP_MD = """
+### Routing Rules Concepts
+
+Routing rules define how traffic should be managed during track closures and other restrictions.
+
+#### Rule Components:
+
+1. **Condition** - When the rule should be applied (track closure, train type, time period)
+2. **Action** - What should happen when the condition is met (use detour, cancel service, etc.)
+3. **Priority** - Higher priority rules are applied first when multiple rules match
+
+#### Common Rule Types:
+
+- **Track Closure Rules** - Specify detours when specific tracks are closed
+- **Train Type Rules** - Apply different actions for different train types
+- **Time Period Rules** - Apply special routing during specific periods
+- **Multiple Track Rules** - Handle complex scenarios with multiple closures
+
+The routing rules work together with detour routes to maintain accessibility during maintenance.
+"""
+
+@dataclass(slots=True)
+class DetourRoute:
+    """Alternative path configured for a closed track"""
+    original_link: str
+    original_from: str
+    original_to: str
+    detour_links: tuple
+    detour_path: tuple
+    train_types: tuple
+
+@lru_cache(maxsize=4096)
 def parse_date(date_str):
-    """Parse date strings to datetime objects"""
+    """Parse date strings to datetime objects (memoized, the same dates are parsed on every rerun)"""
     if not date_str:
         return None
     try:
@@ -63,6 +141,18 @@ def parse_date(date_str):
         return None
 
 
+def parse_dates(dates):
+    """Parse a sequence of dates like parse_date, in one vectorized pass.
+    Returns a datetime64 Series that is NaT where a date is missing or invalid."""
+    date_part = pd.Series(list(dates), dtype=object)
+    # Keep only the date part of datetime strings; datetime objects and missing
+    # values pass through (the .str accessor only accepts string values)
+    is_str = date_part.map(lambda d: isinstance(d, str))
+    if is_str.any():
+        date_part[is_str] = date_part[is_str].str.split(r'[ T]', n=1, regex=True).str[0]
+    return pd.to_datetime(date_part, format=DATE_FORMAT, errors='coerce', cache=True)
+
+
 def format_date(date_obj):
     """Format datetime objects to strings"""
     if not date_obj:
@@ -81,6 +171,7 @@ def create_temp_dir():
         os.makedirs(temp_dir)
     return temp_dir
 
+@lru_cache(maxsize=64)
 def get_maintenance_color(maintenance_type):
     """Return color for different maintenance types"""
     color_map = {
@@ -97,10 +188,21 @@ def get_maintenance_color(maintenance_type):
     }
     return color_map.get(maintenance_type, color_map['Unknown'])
 
+@lru_cache(maxsize=None)
+def get_maintenance_color_map(maintenance_types):
+    """Return a type -> color map for a tuple of maintenance types (memoized, charts share the same type sets)"""
+    return {maintenance_type: get_maintenance_color(maintenance_type) for maintenance_type in maintenance_types}
 
+
+@st.cache_data(show_spinner=False)
+def dataframe_to_csv(df):
+    """Serialize a dataframe as CSV, once per dataframe content"""
+    return df.to_csv(index=False)
+
+@st.cache_data(show_spinner=False)
 def download_dataframe_as_csv(df, filename):
     """Generate a download link for a dataframe as CSV"""
-    csv = df.to_csv(index=False)
+    csv = dataframe_to_csv(df)
     b64 = base64.b64encode(csv.encode()).decode()
     href = f'<a href="data:file/csv;base64,{b64}" download="{filename}.csv">Download {filename} as CSV</a>'
     return href
@@ -120,6 +222,601 @@ def read_xml_file(file):
         st.error(f"Error reading XML file: {str(e)}")
         return None
 
+
+def get_network_options():
+    """Return (track_options, node_options) ID lists for the current network.
+    
+    The lists are kept in session state and rebuilt only when a new network_data
+    object is loaded, so callers must not modify them.
+    """
+    cached = st.session_state.get('network_options')
+    if cached is None or cached[0] is not st.session_state.network_data:
+        cached = (st.session_state.network_data,
+                  [link['id'] for link in st.session_state.network_data['links']],
+                  [node['id'] for node in st.session_state.network_data['nodes']])
+        st.session_state.network_options = cached
+    return cached[1], cached[2]
+
+
+def get_node_coords(network_data):
+    """Return a hashable (node_id, name, lat, lon) tuple for every node"""
+    return tuple((node['id'], node.get('name', node['id']), node.get('lat'), node.get('lon'))
+                 for node in network_data['nodes'])
+
+
+def get_link_endpoints(network_data):
+    """Return a hashable (link_id, from_node, to_node) tuple describing the network topology"""
+    return tuple((link['id'], link['from_node'], link['to_node']) for link in network_data['links'])
+
+
+@st.cache_data(show_spinner=False)
+def build_adjacent_tracks(link_endpoints):
+    """Map each link ID to the set of link IDs that share a node with it"""
+    # Index links by node in a single pass
+    node_to_links = defaultdict(list)
+    for link_id, from_node, to_node in link_endpoints:
+        node_to_links[from_node].append(link_id)
+        node_to_links[to_node].append(link_id)
+
+    # Neighbours are the links at either end, except the link itself. Sets keep
+    # parallel edges and repeated link IDs from producing duplicate neighbours.
+    adjacent_tracks = defaultdict(set)
+    for link_id, from_node, to_node in link_endpoints:
+        for other_id in node_to_links[from_node] + node_to_links[to_node]:
+            if other_id != link_id:
+                adjacent_tracks[link_id].add(other_id)
+
+    return dict(adjacent_tracks)
+
+
+@st.cache_data(show_spinner=False)
+def build_edge_links(link_endpoints):
+    """Map each unordered node pair to the ID of the first link between them"""
+    edge_links = {}
+    for link_id, from_node, to_node in link_endpoints:
+        edge_links.setdefault(frozenset((from_node, to_node)), link_id)
+    return edge_links
+
+
+@st.cache_data(show_spinner=False)
+def build_link_index(link_endpoints):
+    """Map each link ID to the position of its first occurrence in the links list"""
+    link_index = {}
+    for position, (link_id, _, _) in enumerate(link_endpoints):
+        link_index.setdefault(link_id, position)
+    return link_index
+
+
+@st.cache_resource(show_spinner=False)
+def build_node_adjacency(link_endpoints):
+    """Map each node to its (neighbour, link_id) pairs, shared until the topology changes.
+    
+    The adjacency is shared between reruns and sessions, so callers must not modify it.
+    """
+    adjacency = defaultdict(list)
+    for link_id, from_node, to_node in link_endpoints:
+        adjacency[from_node].append((to_node, link_id))
+        adjacency[to_node].append((from_node, link_id))
+    return dict(adjacency)
+
+
+def search_detours(adjacency, from_node, closed_links, to_nodes):
+    """Breadth-first search from from_node that never uses a closed link.
+    
+    Stops once every node in to_nodes is reached and returns the search tree as
+    a node -> (previous node, link_id) dict, with None for from_node.
+    """
+    previous = {from_node: None}
+    remaining = set(to_nodes) - {from_node}
+    queue = deque([from_node])
+    while queue and remaining:
+        node = queue.popleft()
+        for neighbour, link_id in adjacency.get(node, ()):
+            if link_id not in closed_links and neighbour not in previous:
+                previous[neighbour] = (node, link_id)
+                remaining.discard(neighbour)
+                queue.append(neighbour)
+    return previous
+
+
+def trace_detour(previous, to_node):
+    """Return (detour_path, detour_links) to to_node from a search tree, or None if it was not reached"""
+    if to_node not in previous:
+        return None
+    
+    # Walk back from the end node to recover the node and link paths
+    detour_path = [to_node]
+    detour_links = []
+    while previous[detour_path[-1]]:
+        node, link_id = previous[detour_path[-1]]
+        detour_path.append(node)
+        detour_links.append(link_id)
+    return detour_path[::-1], detour_links[::-1]
+
+
+@st.cache_data(show_spinner=False)
+def compute_detour(link_endpoints, closed_track, from_node, to_node):
+    """Return (detour_path, detour_links) around a closed link, or None if no alternative path exists"""
+    adjacency = build_node_adjacency(link_endpoints)
+    previous = search_detours(adjacency, from_node, {closed_track}, [to_node])
+    return trace_detour(previous, to_node)
+
+
+@st.cache_data(show_spinner=False)
+def compute_detours(link_endpoints, closures):
+    """Return a closed link -> (detour_path, detour_links) or None dict for (link_id, from_node, to_node) closures.
+    
+    Closures sharing a from node are treated as closed together and served by
+    a single search from that node.
+    """
+    adjacency = build_node_adjacency(link_endpoints)
+    closures_by_source = defaultdict(list)
+    for closed_track, from_node, to_node in closures:
+        closures_by_source[from_node].append((closed_track, to_node))
+    
+    detours = {}
+    for from_node, group in closures_by_source.items():
+        closed_links = {closed_track for closed_track, _ in group}
+        previous = search_detours(adjacency, from_node, closed_links, [to_node for _, to_node in group])
+        for closed_track, to_node in group:
+            detours[closed_track] = trace_detour(previous, to_node)
+    return detours
+
+
+@st.cache_data(show_spinner=False)
+def build_link_coords(node_coords, link_endpoints):
+    """Return a DataFrame with the endpoint names and coordinates of every drawable link"""
+    node_dict = {node_id: (name, lat, lon) for node_id, name, lat, lon in node_coords}
+    rows = []
+    for link_id, from_node, to_node in link_endpoints:
+        from_info = node_dict.get(from_node)
+        to_info = node_dict.get(to_node)
+        if from_info and to_info and from_info[1] and from_info[2] and to_info[1] and to_info[2]:
+            rows.append((link_id, from_info[0], to_info[0], from_info[1], from_info[2], to_info[1], to_info[2]))
+    return pd.DataFrame(rows, columns=['link_id', 'from_name', 'to_name', 'from_lat', 'from_lon', 'to_lat', 'to_lon'])
+
+
+@st.cache_data(show_spinner=False)
+def build_node_features(node_coords):
+    """Return a GeoJSON FeatureCollection of the nodes that have coordinates"""
+    features = [
+        {
+            'type': 'Feature',
+            'geometry': {'type': 'Point', 'coordinates': [lon, lat]},
+            'properties': {'id': node_id, 'name': name}
+        }
+        for node_id, name, lat, lon in node_coords if lat and lon
+    ]
+    return {'type': 'FeatureCollection', 'features': features}
+
+
+@st.cache_data(show_spinner=False)
+def build_detour_map(node_coords, link_endpoints, selected_detour, detour_links):
+    """Render the detour map for one closed link and its detour links as an HTML string"""
+    # Create a base map centered on Sweden
+    m = folium.Map(location=[62, 15], zoom_start=5)
+    
+    # Add nodes to map as a single GeoJSON layer
+    node_features = build_node_features(node_coords)
+    if node_features['features']:
+        folium.GeoJson(
+            node_features,
+            marker=folium.CircleMarker(radius=3, color='blue', fill=True, fill_opacity=0.7),
+            popup=folium.GeoJsonPopup(fields=['name', 'id'], aliases=['Name:', 'ID:'])
+        ).add_to(m)
+    
+    # Add all links to map as a single GeoJSON layer, styled by detour status
+    link_coords = build_link_coords(node_coords, link_endpoints)
+    is_closed = (link_coords['link_id'] == selected_detour).to_numpy()
+    is_detour = link_coords['link_id'].isin(set(detour_links)).to_numpy() & ~is_closed
+    is_highlighted = is_closed | is_detour
+    colors = np.where(is_closed, 'red', np.where(is_detour, 'green', 'blue'))
+    weights = np.where(is_highlighted, 3, 1)
+    opacities = np.where(is_highlighted, 1.0, 0.5)
+    
+    link_features = [
+        {
+            'type': 'Feature',
+            'geometry': {'type': 'LineString', 'coordinates': [[from_lon, from_lat], [to_lon, to_lat]]},
+            'properties': {'id': link_id, 'from': from_name, 'to': to_name, 'color': color,
+                           'weight': int(weight), 'opacity': float(opacity),
+                           'dash_array': '5, 5' if detour else None}
+        }
+        for link_id, from_name, to_name, from_lat, from_lon, to_lat, to_lon, color, weight, opacity, detour
+        in zip(*(link_coords[col] for col in link_coords.columns), colors, weights, opacities, is_detour)
+    ]
+    
+    if link_features:
+        folium.GeoJson(
+            {'type': 'FeatureCollection', 'features': link_features},
+            style_function=lambda feature: {
+                'color': feature['properties']['color'],
+                'weight': feature['properties']['weight'],
+                'opacity': feature['properties']['opacity'],
+                'dashArray': feature['properties']['dash_array']
+            },
+            popup=folium.GeoJsonPopup(fields=['id', 'from', 'to'], aliases=['Link:', 'From:', 'To:'])
+        ).add_to(m)
+    
+    # Add legend
+    legend_html = '''
+    <div style="position: fixed; bottom: 50px; left: 50px; z-index:1000; background-color: white; 
+                padding: 10px; border: 1px solid grey; border-radius: 5px;">
+        <p><b>Legend</b></p>
+        <p><i style="background: blue; width: 10px; height: 10px; display: inline-block;"></i> Regular Track</p>
+        <p><i style="background: red; width: 10px; height: 10px; display: inline-block;"></i> Closed Track</p>
+        <p><i style="background: green; width: 10px; height: 10px; display: inline-block;
+                    border-top: 1px dashed #000;"></i> Detour Route</p>
+    </div>
+    '''
+    
+    # Add legend safely
+    root = m.get_root()
+    if hasattr(root, 'html') and hasattr(root.html, 'add_child'):
+        root.html.add_child(folium.Element(legend_html))
+    else:
+        # Alternative approach if the expected structure isn't available
+        m.get_root().get_name()  # No-op to prevent error
+    
+    return m.get_root().render()
+
+
+@st.cache_data(show_spinner=False)
+def build_rules_tables(rules_rows):
+    """Return the routing rules table and the same table sorted by descending priority"""
+    rules_df = pd.DataFrame(list(rules_rows), columns=['ID', 'Name', 'Priority', 'Condition', 'Action', 'Description'])
+    return rules_df, rules_df.sort_values('Priority', ascending=False)
+
+
+@st.cache_data(show_spinner=False)
+def render_rule_markdown(rule):
+    """Render the details of a routing rule as markdown (cached until the rule changes)"""
+    return f"""
+    ### {rule['name']}
+    
+    **Description:** {rule['description']}
+    
+    **Priority:** {rule['priority']}
+    
+    **Condition Type:** {rule['condition_type']}
+    
+    **Condition Details:**
+    ```
+    {rule['condition_details']}
+    ```
+    
+    **Action Type:** {rule['action_type']}
+    
+    **Action Details:**
+    ```
+    {rule['action_details']}
+    ```
+    
+    **Created:** {rule['created_date']}
+    """
+
+
+@st.cache_data(show_spinner=False)
+def default_parallelism(types_tuple):
+    """Return the default parallelism matrix for the given maintenance types"""
+    matrix = {}
+    for type1 in types_tuple:
+        matrix[type1] = {}
+        for type2 in types_tuple:
+            # Default to False (not parallel) for most combinations
+            can_parallel = False
+            
+            # Allow same type to be parallel by default (except Renewal)
+            if type1 == type2 and type1 != 'Renewal':
+                can_parallel = True
+            
+            # Allow Preventive and Inspection to be parallel by default
+            if (type1 == 'Preventive' and type2 == 'Inspection') or \
+               (type1 == 'Inspection' and type2 == 'Preventive'):
+                can_parallel = True
+            
+            matrix[type1][type2] = can_parallel
+    return matrix
+
+
+@st.cache_data(show_spinner=False)
+def build_optimized_gantt(gantt_key):
+    """Build the optimized schedule Gantt chart from (task, start_date, duration_days, type, id) rows"""
+    # Rows built column by column; measures without a valid start date are dropped
+    gantt_df = pd.DataFrame(list(gantt_key), columns=['Task', 'Start', 'Duration', 'Type', 'ID'])
+    gantt_df['Start'] = pd.to_datetime(gantt_df['Start'].map(parse_date))
+    
+    # One color lookup per maintenance type, shared by the rows and the legend
+    color_map = get_maintenance_color_map(tuple(gantt_df['Type'].unique()))
+    
+    gantt_df = gantt_df.dropna(subset=['Start'])
+    gantt_df['Finish'] = gantt_df['Start'] + pd.to_timedelta(gantt_df['Duration'], unit='D')
+    gantt_df['Color'] = gantt_df['Type'].map(color_map)
+    
+    fig = ff.create_gantt(
+        gantt_df[['Task', 'Start', 'Finish', 'Type', 'ID', 'Color']].to_dict('records'),
+        colors=dict(color_map),  # create_gantt rewrites the colors it is given in place
+        index_col='Type',
+        title="Optimized Maintenance Schedule",
+        show_colorbar=True,
+        group_tasks=True,
+        showgrid_x=True,
+        showgrid_y=True
+    )
+    
+    fig.update_layout(
+        autosize=True,
+        height=600,
+        margin=dict(l=50, r=50, b=100, t=100)
+    )
+    return fig
+
+@st.cache_data(show_spinner=False)
+def build_parallel_table(parallelism_matrix):
+    """Convert the parallelism matrix into a type -> index map and a boolean array.
+    The extra last row and column are False, so unknown types (index -1) are never parallel."""
+    matrix_types = list(parallelism_matrix)
+    type_index = {t: i for i, t in enumerate(matrix_types)}
+    parallel = np.zeros((len(matrix_types) + 1, len(matrix_types) + 1), dtype=np.bool_)
+    for i, type1 in enumerate(matrix_types):
+        for j, type2 in enumerate(matrix_types):
+            parallel[i, j] = bool(parallelism_matrix[type1].get(type2, False))
+    return type_index, parallel
+
+@st.cache_data(show_spinner=False)
+def build_conflict_gantt(gantt_key):
+    """Build the conflict Gantt chart from (task, start_date, duration_days, type, id) rows"""
+    gantt_data = []
+    for task, start_date_str, duration_days, gantt_type, measure_id in gantt_key:
+        # Parse dates
+        start_date_obj = parse_date(start_date_str)
+        
+        if start_date_obj:
+            # Calculate end date
+            end_date_obj = start_date_obj + timedelta(days=duration_days)
+            
+            # Determine color based on conflict status
+            if gantt_type == 'Conflict':
+                color = 'red'  # Conflict color
+            else:
+                color = get_maintenance_color(gantt_type)
+            
+            # Add to Gantt data
+            gantt_data.append({
+                'Task': task,
+                'Start': start_date_obj,
+                'Finish': end_date_obj,
+                'Type': gantt_type,
+                'ID': measure_id,
+                'Color': color
+            })
+    
+    # Create Gantt chart
+    fig = ff.create_gantt(
+        gantt_data,
+        colors={'Conflict': 'red', 'Preventive': '#00CC00', 'Corrective': '#FF9900', 
+               'Renewal': '#FF0000', 'ERTMS Implementation': '#0066FF', 
+               'Inspection': '#9900CC', 'Unknown': '#CCCCCC'},
+        index_col='Type',
+        title="Maintenance Schedule with Conflicts",
+        show_colorbar=True,
+        group_tasks=True,
+        showgrid_x=True,
+        showgrid_y=True
+    )
+    
+    fig.update_layout(
+        autosize=True,
+        height=600,
+        margin=dict(l=50, r=50, b=100, t=100)
+    )
+    return fig
+
+@st.cache_data(show_spinner=False)
+def load_schedule_results(schedule_file, mtime):
+    """Extract the objective, the cancelled project count and the scheduled
+    (measure id, start, end) instances from a schedule results file.
+    mtime is part of the cache key, so the file is re-read only after it changes."""
+    # Stream the file once, keeping the chain of open elements so each element's
+    # parents are known; scheduled projects are cleared once they are processed
+    stack = []
+    objective_elem = None
+    cancelled_projects = 0
+    instances = []
+    for event, elem in ET.iterparse(schedule_file, events=('start', 'end')):
+        if event == 'start':
+            stack.append(elem)
+            if elem.tag == 'objective' and objective_elem is None and len(stack) > 1:
+                objective_elem = elem
+            continue
+        
+        stack.pop()
+        parent = stack[-1].tag if len(stack) > 1 else None
+        if elem.tag == 'instance' and parent == 'task' and len(stack) > 3 and \
+           stack[-2].tag == 'project' and stack[-3].tag == 'schedule':
+            # .//schedule/project/task/instance
+            proj_id, task_id = stack[-2].get('id'), stack[-1].get('id')
+            index = int(elem.get('index', 0))
+            start = datetime.fromisoformat(elem.get('start'))
+            end = datetime.fromisoformat(elem.get('end'))
+            instances.append((f"{proj_id}_{task_id}_{index}", start, end))
+        elif elem.tag == 'project' and parent == 'cancelled':
+            cancelled_projects += 1
+        elif elem.tag == 'project' and parent == 'schedule':
+            elem.clear()
+    
+    return {
+        'objective': float(objective_elem.text),
+        'cancelled_projects': cancelled_projects,
+        'instances': instances
+    }
+
+@st.cache_resource(show_spinner=False)
+def load_traffic_flows(traffic_file, mtime):
+    """Extract the flows of a traffic results file as a Line/Route/Period/Link/Value DataFrame.
+    mtime is part of the cache key, so the file is re-read only after it changes.
+    
+    The frame is shared between reruns and sessions, so callers must not modify it.
+    """
+    # Read the flow attributes straight into columns
+    try:
+        flows = pd.read_xml(traffic_file, xpath='.//flow', parser='etree',
+                            dtype={'line': str, 'route': str, 'link': str})
+    except ValueError:
+        # The file has no flow elements
+        return pd.DataFrame()
+    
+    flows = flows.reindex(columns=['line', 'route', 'period', 'link', 'value'])
+    return pd.DataFrame({
+        'Line': flows['line'].astype('category'),
+        'Route': flows['route'].fillna('normal').astype('category'),
+        'Period': flows['period'].fillna(0).astype('int32'),
+        'Link': flows['link'].fillna('').astype('category'),
+        'Value': flows['value'].fillna(0).astype(float)
+    })
+
+@st.cache_data(show_spinner=False)
+def build_schedule_filters(schedule_key):
+    """From (start_date, track_id) rows, return each measure's start year (NaN when
+    undated) and track id as arrays, plus the sorted year and track filter options"""
+    starts = parse_dates(start_date for start_date, _ in schedule_key)
+    start_years = starts.dt.year.to_numpy()
+    track_ids = np.array([track_id for _, track_id in schedule_key], dtype=object)
+    
+    year_options = sorted({int(year) for year in start_years[~np.isnan(start_years)]})
+    track_options = sorted({track_id for track_id in track_ids if track_id})
+    return start_years, track_ids, year_options, track_options
+
+@st.cache_data(show_spinner=False)
+def build_maintenance_frame(maintenance_key):
+    """Build the report frame from (track_id, description, type, start_date, duration_days,
+    responsible_unit, estimated_cost) rows, with the start date parsed once and its year,
+    month and quarter labels (missing when the measure is undated)"""
+    maintenance_df = pd.DataFrame(list(maintenance_key), columns=[
+        'track_id', 'description', 'type', 'start_date', 'duration_days', 'responsible_unit', 'estimated_cost'
+    ])
+    # Costs are kept as given, so integer estimates are not widened to float by missing ones
+    maintenance_df['estimated_cost'] = pd.Series([row[-1] for row in maintenance_key], dtype=object)
+    maintenance_df['start_date'] = parse_dates(maintenance_df['start_date'])
+    maintenance_df['year'] = maintenance_df['start_date'].dt.year
+    maintenance_df['month_str'] = maintenance_df['start_date'].dt.strftime('%Y-%m')
+    maintenance_df['quarter'] = maintenance_df['start_date'].dt.to_period('Q').dt.strftime('Q%q %Y')
+    return maintenance_df
+
+@st.cache_data(show_spinner=False)
+def build_report_timeline(timeline_df):
+    """Build the report Gantt chart from the Task/Start/Finish/Track/Type/Duration timeline rows,
+    with one row per track and the bars colored by maintenance type"""
+    fig = px.timeline(
+        timeline_df,
+        x_start='Start',
+        x_end='Finish',
+        y='Track',
+        color='Type',
+        color_discrete_map=get_maintenance_color_map(tuple(timeline_df['Type'].unique())),
+        hover_name='Task',
+        hover_data=['Duration'],
+        title="Maintenance Timeline"
+    )
+    
+    # List the tracks top to bottom, as the Gantt chart did
+    fig.update_yaxes(autorange='reversed')
+    fig.update_layout(
+        autosize=True,
+        height=600,
+        margin=dict(l=50, r=50, b=100, t=100)
+    )
+    return fig
+
+@st.cache_data(show_spinner=False)
+def build_report_figure(chart, chart_df, **chart_args):
+    """Build a report chart with the named plotly express function, so an unchanged
+    chart is not rebuilt on every rerun"""
+    return getattr(px, chart)(chart_df, **chart_args)
+
+@st.cache_data(show_spinner=False)
+def build_synthetic_impact(cancelled, delayed, diverted, periods=10):
+    """Generate per-period impact counts in long form for the stacked area chart, seeded
+    from the impact totals so the chart does not change on every rerun"""
+    rng = np.random.default_rng(hash((cancelled, delayed, diverted)) & 0xFFFFFFFF)
+    impact_by_period = pd.DataFrame({
+        'Period': list(range(periods)),
+        'Cancelled': rng.integers(0, 20, periods),
+        'Delayed': rng.integers(10, 30, periods),
+        'Diverted': rng.integers(5, 25, periods)
+    })
+    
+    # Reshape for stacked area chart
+    return pd.melt(
+        impact_by_period, 
+        id_vars=['Period'], 
+        value_vars=['Cancelled', 'Delayed', 'Diverted'],
+        var_name='Impact Type', 
+        value_name='Count'
+    )
+
+async def run_solver(cmd, progress_bar, status_text, log_output):
+    """Run the optimization command, streaming its output into the log and progress
+    placeholders, and return its exit code"""
+    # The solver is a Python script; unbuffered output lets progress lines arrive
+    # as they are printed rather than when its stdout buffer fills
+    process = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.STDOUT,
+        limit=SOLVER_READ_SIZE,
+        env={**os.environ, 'PYTHONUNBUFFERED': '1'}
+    )
+    
+    # Append the output to a buffer that is trimmed back to its tail as it grows,
+    # and refresh the log at most every LOG_FLUSH_INTERVAL seconds
+    log_buffer = io.StringIO()
+    last_flush = time.monotonic()
+    pending = b''
+    finished = False
+    
+    while not finished:
+        # Take whatever output is available, waking up at least every
+        # SOLVER_POLL_TIMEOUT seconds so the log is refreshed while the solver is silent
+        lines = []
+        try:
+            chunk = await asyncio.wait_for(process.stdout.read(SOLVER_READ_SIZE), SOLVER_POLL_TIMEOUT)
+        except asyncio.TimeoutError:
+            chunk = None
+        
+        if chunk is not None:
+            finished = not chunk
+            *lines, pending = (pending + chunk).split(b'\n')
+            if finished and pending:
+                lines.append(pending)
+        
+        for raw_line in lines:
+            line = raw_line.decode(errors='replace').rstrip('\r') + '\n'
+            log_buffer.write(line)
+            
+            # Update progress bar based on output
+            match = SOLVER_PROGRESS_RE.search(line)
+            if match and match.group(1):
+                # Iteration line, progress follows the iteration number
+                iteration = int(match.group(1))
+                progress_bar.progress(min(80, 30 + 10 * iteration))
+                status_text.text(f"Optimization iteration {iteration}...")
+            elif match:
+                progress, status = SOLVER_PROGRESS_STEPS[match.group(0)]
+                progress_bar.progress(progress)
+                status_text.text(status)
+        
+        if log_buffer.tell() > 2 * MAX_LOG_CHARS:
+            log_buffer = io.StringIO(log_buffer.getvalue()[-MAX_LOG_CHARS:])
+            log_buffer.seek(0, io.SEEK_END)
+        
+        if time.monotonic() - last_flush > LOG_FLUSH_INTERVAL:
+            log_output.code(log_buffer.getvalue()[-MAX_LOG_CHARS:])
+            last_flush = time.monotonic()
+    
+    log_output.code(log_buffer.getvalue()[-MAX_LOG_CHARS:])
+    return await process.wait()
+
 # Initialize session state for data persistence
 if 'network_data' not in st.session_state:
     st.session_state.network_data = None
@@ -563,7 +1260,7 @@ elif app_mode == "Data Management":
                     
                     with col1:
                         # Get track options from network data
-                        track_options = [l['id'] for l in st.session_state.network_data['links']]
+                        track_options, _ = get_network_options()
                         track_id = st.selectbox("Track", options=track_options)
                         
                         measure_type = st.selectbox("Measure Type", 
@@ -1268,14 +1965,14 @@ elif app_mode == "Data Management":
                                         break
                             
                             if alt_links:
-                                st.session_state.detour_routes[link_id] = {
-                                    'original_link': link_id,
-                                    'original_from': link['from_node'],
-                                    'original_to': link['to_node'],
-                                    'detour_links': alt_links,
-                                    'detour_path': alt_path,
-                                    'train_types': ['ALL']  # Default to all train types
-                                }
+                                st.session_state.detour_routes[link_id] = DetourRoute(
+                                    original_link=link_id,
+                                    original_from=link['from_node'],
+                                    original_to=link['to_node'],
+                                    detour_links=tuple(alt_links),
+                                    detour_path=tuple(alt_path),
+                                    train_types=('ALL',)  # Default to all train types
+                                )
                         except nx.NetworkXNoPath:
                             # No alternative path
                             pass
@@ -1443,6 +2140,11 @@ elif app_mode == "Network Visualization":
                                 maintenance_on_link[track_id] = []
                             maintenance_on_link[track_id].append(maintenance_item)
             
+            # Links of the selected detour route, for constant-time membership tests
+            detour_set = set()
+            if selected_detour != 'None' and selected_detour in st.session_state.detour_routes:
+                detour_set = set(st.session_state.detour_routes[selected_detour].detour_links)
+            
             # Add links to map
             for link in filtered_links:
                 from_node = node_dict.get(link['from_node'])
@@ -1480,8 +2182,7 @@ elif app_mode == "Network Visualization":
                     is_detour = False
                     is_original = False
                     if selected_detour != 'None' and selected_detour in st.session_state.detour_routes:
-                        detour_info = st.session_state.detour_routes[selected_detour]
-                        if link['id'] in detour_info['detour_links']:
+                        if link['id'] in detour_set:
                             is_detour = True
                         elif link['id'] == selected_detour:
                             is_original = True
@@ -1574,14 +2275,14 @@ elif app_mode == "Network Visualization":
                 detour_info = st.session_state.detour_routes[selected_detour]
                 
                 st.markdown(f"""
-                **Original Link:** {detour_info['original_link']} 
-                (from {detour_info['original_from']} to {detour_info['original_to']})
+                **Original Link:** {detour_info.original_link} 
+                (from {detour_info.original_from} to {detour_info.original_to})
                 
-                **Detour Path:** {' → '.join(detour_info['detour_path'])}
+                **Detour Path:** {' → '.join(detour_info.detour_path)}
                 
-                **Detour Links:** {', '.join(detour_info['detour_links'])}
+                **Detour Links:** {', '.join(detour_info.detour_links)}
                 
-                **Train Types:** {', '.join(detour_info['train_types'])}
+                **Train Types:** {', '.join(detour_info.train_types)}
                 """)
         
         # NETWORK GRAPH
@@ -1642,12 +2343,12 @@ elif app_mode == "Network Visualization":
             
             # Highlight detour route if selected
             if selected_detour != 'None' and selected_detour in st.session_state.detour_routes:
-                detour_info = st.session_state.detour_routes[selected_detour]
+                detour_set = set(st.session_state.detour_routes[selected_detour].detour_links)
                 for i, e in enumerate(G.edges):
                     link_id = G.edges[e].get('id')
                     if link_id == selected_detour:
                         edge_colors[i] = 'purple'  # Original link
-                    elif link_id in detour_info['detour_links']:
+                    elif link_id in detour_set:
                         edge_colors[i] = 'green'  # Detour route
             
             edge_widths = [G.edges[e].get('tracks', 1) for e in G.edges]
@@ -2264,184 +2965,177 @@ elif app_mode == "Conflict Detection":
         
         if conflict_button:
             with st.spinner("Detecting conflicts..."):
-                # Detect date overlaps for the same track
+                # Detect date overlaps for the same track. Each conflict is stored as a
+                # row of the display table, with the measures it involves kept in
+                # conflict_refs at the same position for the resolution form.
                 conflicts = []
-                
-                # Process the maintenance data
-                measures_by_track = {}
+                conflict_refs = []
+                
+                def add_conflict(tracks, measure1, measure2, start1, start2, conflict_type, severity):
+                    conflicts.append((
+                        tracks,
+                        measure1.get('description', 'Unknown'),
+                        measure1.get('type', 'Unknown'),
+                        start1.strftime('%Y-%m-%d'),
+                        measure2.get('description', 'Unknown'),
+                        measure2.get('type', 'Unknown'),
+                        start2.strftime('%Y-%m-%d'),
+                        conflict_type,
+                        severity
+                    ))
+                    conflict_refs.append((measure1, measure2, start1, start2))
+                
+                # Parse each measure's dates once. Overlap checks compare day ordinals and
+                # the start date is kept for display:
+                # id -> (start date, start ordinal, end ordinal, end ordinal with buffer)
+                parsed = {}
+                for measure in st.session_state.maintenance_data:
+                    start = parse_date(measure.get('start_date', ''))
+                    if start:
+                        start_ord = start.toordinal()
+                        end_ord = start_ord + measure.get('duration_days', 1)
+                        parsed[measure['id']] = (start, start_ord, end_ord, end_ord + buffer_days)
+                
+                # Columnar view of the dated measures for the vectorized checks;
+                # 'pos' points back into dated_measures
+                dated_measures = [m for m in st.session_state.maintenance_data if m['id'] in parsed]
+                measures_df = pd.DataFrame({
+                    'pos': np.arange(len(dated_measures)),
+                    'track_id': [str(m.get('track_id')) for m in dated_measures],
+                    'responsible_unit': pd.Categorical([str(m.get('responsible_unit', 'Unknown')) for m in dated_measures]),
+                    'start_ord': np.array([parsed[m['id']][1] for m in dated_measures], dtype=np.int64),
+                    'end_ord': np.array([parsed[m['id']][3] for m in dated_measures], dtype=np.int64)
+                })
+                
+                # Parallelism matrix as a boolean array plus a type -> row index map
+                type_index, parallel = build_parallel_table(st.session_state.parallelism_matrix)
+                
+                # Process the maintenance data in one pass, grouping each dated measure's
+                # (start, end, type index, position on track, measure) interval by track
+                # and keeping track closures separately for the adjacent-track check
+                intervals_by_track = defaultdict(list)
+                closures_by_track = defaultdict(list)
                 for measure in st.session_state.maintenance_data:
                     track_id = measure.get('track_id')
                     if track_id:
-                        if track_id not in measures_by_track:
-                            measures_by_track[track_id] = []
-                        measures_by_track[track_id].append(measure)
+                        intervals = intervals_by_track[track_id]
+                        if measure['id'] in parsed:
+                            dates = parsed[measure['id']]
+                            intervals.append((dates[1], dates[3], type_index.get(measure.get('type', 'Unknown'), -1),
+                                              len(intervals), measure))
+                            if measure.get('track_closure', False):
+                                closures_by_track[track_id].append((dates, measure))
                 
                 # Check for conflicts on each track
                 if check_same_track:
-                    for track_id, measures in measures_by_track.items():
-                        # Sort measures by start date
-                        sorted_measures = sorted(measures, key=lambda m: parse_date(m.get('start_date', '')) or datetime.min)
-                        
-                        # Check for overlaps
-                        for i in range(len(sorted_measures)):
-                            measure1 = sorted_measures[i]
-                            start1 = parse_date(measure1.get('start_date', ''))
-                            if start1:
-                                duration1 = measure1.get('duration_days', 1)
-                                end1 = start1 + timedelta(days=duration1 + buffer_days)
-                                
-                                for j in range(i + 1, len(sorted_measures)):
-                                    measure2 = sorted_measures[j]
-                                    start2 = parse_date(measure2.get('start_date', ''))
-                                    if start2:
-                                        # Check for overlap
-                                        if start2 <= end1:
-                                            # Check if these types can be parallel
-                                            type1 = measure1.get('type', 'Unknown')
-                                            type2 = measure2.get('type', 'Unknown')
-                                            
-                                            # Check parallelism matrix
-                                            can_be_parallel = False
-                                            if type1 in st.session_state.parallelism_matrix and \
-                                               type2 in st.session_state.parallelism_matrix[type1]:
-                                                can_be_parallel = st.session_state.parallelism_matrix[type1][type2]
-                                            
-                                            if not can_be_parallel:
-                                                # Add to conflicts
-                                                conflicts.append({
-                                                    'track_id': track_id,
-                                                    'measure1': measure1,
-                                                    'measure2': measure2,
-                                                    'start1': start1,
-                                                    'end1': end1 - timedelta(days=buffer_days),
-                                                    'start2': start2,
-                                                    'can_be_parallel': False,
-                                                    'type': 'Date Overlap',
-                                                    'conflict_severity': 'High'
-                                                })
+                    for track_id, intervals in intervals_by_track.items():
+                        # Sort by start date (stable, so same-day measures keep their order)
+                        intervals.sort(key=itemgetter(0))
+
+                        # Sweep line: the heap holds earlier intervals that are still open,
+                        # keyed on end date so expired ones can be dropped cheaply
+                        active = []
+                        for start2, end2, type2, idx2, measure2 in intervals:
+                            while active and active[0][0] < start2:
+                                heapq.heappop(active)
+
+                            # Every remaining active interval overlaps the current one
+                            for end1, idx1, type1, measure1 in active:
+                                # Check parallelism matrix
+                                if not parallel[type1, type2]:
+                                    # Add to conflicts
+                                    add_conflict(track_id, measure1, measure2,
+                                                 parsed[measure1['id']][0], parsed[measure2['id']][0],
+                                                 'Date Overlap', 'High')
+
+                            heapq.heappush(active, (end2, idx2, type2, measure2))
                 
                 # Check for adjacent track conflicts if network data is available
                 if check_adjacent_tracks and st.session_state.network_data:
-                    # Build adjacency dictionary
-                    adjacent_tracks = {}
-                    
-                    for link in st.session_state.network_data['links']:
-                        link_id = link['id']
-                        from_node = link['from_node']
-                        to_node = link['to_node']
+                    # Build adjacency dictionary (cached until the network topology changes)
+                    adjacent_tracks = build_adjacent_tracks(get_link_endpoints(st.session_state.network_data))
+
+                    # Index each track's closures by start date. Together with the longest
+                    # closure on the track this bounds the slice of closures that can
+                    # overlap a given interval, so it is found with two binary searches.
+                    closure_index = {}
+                    for track_id, track_closures in closures_by_track.items():
+                        closures = sorted(((start, end, measure) for (_, start, end, _), measure in track_closures),
+                                          key=lambda c: c[0])
+                        closure_index[track_id] = {
+                            'starts': [c[0] for c in closures],
+                            'closures': closures,
+                            'max_span': max(end - start for start, end, _ in closures)
+                        }
+
+                    # Check for conflicts on adjacent tracks, visiting only closed tracks
+                    # and their closed neighbours
+                    closed_tracks = set(closure_index)
+                    for track_id in closed_tracks & adjacent_tracks.keys():
+                        closed_neighbours = adjacent_tracks[track_id] & closed_tracks
+                        if not closed_neighbours:
+                            continue
                         
-                        # Find adjacent links
-                        for other_link in st.session_state.network_data['links']:
-                            if other_link['id'] != link_id:
-                                # Check if they share a node
-                                if (other_link['from_node'] == from_node or 
-                                    other_link['from_node'] == to_node or
-                                    other_link['to_node'] == from_node or
-                                    other_link['to_node'] == to_node):
-                                    
-                                    if link_id not in adjacent_tracks:
-                                        adjacent_tracks[link_id] = []
-                                    
-                                    adjacent_tracks[link_id].append(other_link['id'])
-                    
-                    # Check for conflicts on adjacent tracks
-                    for track_id, adjacent_ids in adjacent_tracks.items():
-                        if track_id in measures_by_track:
-                            for measure1 in measures_by_track[track_id]:
-                                start1 = parse_date(measure1.get('start_date', ''))
-                                if start1 and measure1.get('track_closure', False):  # Only check if track is closed
-                                    duration1 = measure1.get('duration_days', 1)
-                                    end1 = start1 + timedelta(days=duration1 + buffer_days)
-                                    
-                                    # Check each adjacent track
-                                    for adj_id in adjacent_ids:
-                                        if adj_id in measures_by_track:
-                                            for measure2 in measures_by_track[adj_id]:
-                                                if measure2.get('track_closure', False):  # Only check if adjacent track is closed
-                                                    start2 = parse_date(measure2.get('start_date', ''))
-                                                    if start2:
-                                                        # Check for overlap
-                                                        if (start1 <= start2 <= end1) or (start2 <= start1 <= start2 + timedelta(days=measure2.get('duration_days', 1))):
-                                                            # Add to conflicts
-                                                            conflicts.append({
-                                                                'track_id': f"{track_id} & {adj_id}",
-                                                                'measure1': measure1,
-                                                                'measure2': measure2,
-                                                                'start1': start1,
-                                                                'end1': end1 - timedelta(days=buffer_days),
-                                                                'start2': start2,
-                                                                'can_be_parallel': False,
-                                                                'type': 'Adjacent Track Closure',
-                                                                'conflict_severity': 'Medium'
-                                                            })
+                        for start1, end, measure1 in closure_index[track_id]['closures']:
+                            end1 = end + buffer_days
+                            start1_date = parsed[measure1['id']][0]
+
+                            # Check each adjacent track
+                            for adj_id in closed_neighbours:
+                                adj_index = closure_index[adj_id]
+                                lo = bisect.bisect_left(adj_index['starts'], start1 - adj_index['max_span'])
+                                hi = bisect.bisect_right(adj_index['starts'], end1)
+
+                                for start2, end2, measure2 in adj_index['closures'][lo:hi]:
+                                    # Check for overlap
+                                    if end2 >= start1:
+                                        # Add to conflicts
+                                        add_conflict(f"{track_id} & {adj_id}", measure1, measure2,
+                                                     start1_date, parsed[measure2['id']][0],
+                                                     'Adjacent Track Closure', 'Medium')
                 
                 # Check for resource conflicts
                 if check_resource_conflicts:
-                    # Group measures by responsible unit
-                    measures_by_unit = {}
-                    for measure in st.session_state.maintenance_data:
-                        unit = measure.get('responsible_unit', 'Unknown')
-                        if unit not in measures_by_unit:
-                            measures_by_unit[unit] = []
-                        measures_by_unit[unit].append(measure)
+                    # Sort dated measures once by responsible unit and start date, so each
+                    # unit's group is already in start order
+                    measures_sorted = measures_df.sort_values(['responsible_unit', 'start_ord'], kind='stable')
                     
                     # Check for overlaps within each unit
-                    for unit, unit_measures in measures_by_unit.items():
-                        # Sort measures by start date
-                        sorted_measures = sorted(unit_measures, key=lambda m: parse_date(m.get('start_date', '')) or datetime.min)
+                    for unit, unit_df in measures_sorted.groupby('responsible_unit', sort=False, observed=True):
+                        if len(unit_df) < 2:
+                            continue
+                        
+                        sorted_measures = [dated_measures[pos] for pos in unit_df['pos']]
+                        starts = unit_df['start_ord'].to_numpy()
+                        ends = unit_df['end_ord'].to_numpy()
+                        track_ids = unit_df['track_id'].to_numpy()
+                        
+                        # Measures are sorted by start, so the later measures overlapping
+                        # measure i stop at the first one starting after its end
+                        overlap_ends = np.searchsorted(starts, ends, side='right')
                         
-                        # Check for overlaps
                         for i in range(len(sorted_measures)):
+                            # Skip same-track pairs (already checked)
+                            later = np.arange(i + 1, overlap_ends[i])
+                            later = later[track_ids[later] != track_ids[i]]
+                            
                             measure1 = sorted_measures[i]
-                            start1 = parse_date(measure1.get('start_date', ''))
-                            if start1:
-                                duration1 = measure1.get('duration_days', 1)
-                                end1 = start1 + timedelta(days=duration1 + buffer_days)
+                            for j in later:
+                                measure2 = sorted_measures[j]
                                 
-                                for j in range(i + 1, len(sorted_measures)):
-                                    measure2 = sorted_measures[j]
-                                    # Skip if same track (already checked)
-                                    if measure1.get('track_id') == measure2.get('track_id'):
-                                        continue
-                                    
-                                    start2 = parse_date(measure2.get('start_date', ''))
-                                    if start2:
-                                        # Check for overlap
-                                        if start2 <= end1:
-                                            # Add to conflicts
-                                            conflicts.append({
-                                                'track_id': f"{measure1.get('track_id', 'Unknown')} & {measure2.get('track_id', 'Unknown')}",
-                                                'measure1': measure1,
-                                                'measure2': measure2,
-                                                'start1': start1,
-                                                'end1': end1 - timedelta(days=buffer_days),
-                                                'start2': start2,
-                                                'can_be_parallel': False,
-                                                'type': 'Resource Conflict',
-                                                'conflict_severity': 'Low'
-                                            })
+                                # Add to conflicts
+                                add_conflict(f"{measure1.get('track_id', 'Unknown')} & {measure2.get('track_id', 'Unknown')}",
+                                             measure1, measure2, parsed[measure1['id']][0], parsed[measure2['id']][0],
+                                             'Resource Conflict', 'Low')
                 
                 # Display conflicts
                 if conflicts:
                     st.error(f"Detected {len(conflicts)} conflicts!")
                     
-                    # Create a dataframe for display
-                    conflict_display = []
-                    for conflict in conflicts:
-                        conflict_display.append({
-                            'Tracks': conflict['track_id'],
-                            'Measure 1': conflict['measure1'].get('description', 'Unknown'),
-                            'Type 1': conflict['measure1'].get('type', 'Unknown'),
-                            'Start 1': conflict['start1'].strftime('%Y-%m-%d'),
-                            'Measure 2': conflict['measure2'].get('description', 'Unknown'),
-                            'Type 2': conflict['measure2'].get('type', 'Unknown'),
-                            'Start 2': conflict['start2'].strftime('%Y-%m-%d'),
-                            'Conflict Type': conflict['type'],
-                            'Severity': conflict['conflict_severity']
-                        })
-                    
                     # Display conflict table
-                    conflict_df = pd.DataFrame(conflict_display)
+                    conflict_df = pd.DataFrame(conflicts, columns=['Tracks', 'Measure 1', 'Type 1', 'Start 1',
+                                                                   'Measure 2', 'Type 2', 'Start 2',
+                                                                   'Conflict Type', 'Severity'])
                     
                     # Apply color formatting to severity column
                     def highlight_severity(val):
@@ -2459,62 +3153,23 @@ elif app_mode == "Conflict Detection":
                     # Show conflict visualization
                     st.subheader("Conflict Visualization")
                     
-                    # Create a Gantt chart highlighting conflicts
-                    gantt_data = []
-                    
-                    # Add all maintenance measures
-                    for measure in st.session_state.maintenance_data:
-                        # Parse dates
-                        start_date_str = measure.get('start_date', '')
-                        start_date_obj = parse_date(start_date_str)
-                        
-                        if start_date_obj:
-                            # Calculate end date
-                            duration_days = measure.get('duration_days', 1)
-                            end_date_obj = start_date_obj + timedelta(days=duration_days)
-                            
-                            # Check if this measure is in a conflict
-                            is_conflict = False
-                            for conflict in conflicts:
-                                if measure == conflict['measure1'] or measure == conflict['measure2']:
-                                    is_conflict = True
-                                    break
-                            
-                            # Determine color based on conflict status
-                            if is_conflict:
-                                color = 'red'  # Conflict color
-                            else:
-                                color = get_maintenance_color(measure.get('type', 'Unknown'))
-                            
-                            # Add to Gantt data
-                            gantt_data.append({
-                                'Task': f"{measure.get('track_id', 'Unknown')}: {measure.get('description', 'Unknown')}",
-                                'Start': start_date_obj,
-                                'Finish': end_date_obj,
-                                'Type': "Conflict" if is_conflict else measure.get('type', 'Unknown'),
-                                'ID': measure.get('id', 'Unknown'),
-                                'Color': color
-                            })
+                    # Gantt type of every measure involved in a conflict
+                    conflict_type_by_id = {}
+                    for measure1, measure2, _, _ in conflict_refs:
+                        conflict_type_by_id.setdefault(measure1['id'], 'Conflict')
+                        conflict_type_by_id.setdefault(measure2['id'], 'Conflict')
                     
-                    # Create Gantt chart
-                    fig = ff.create_gantt(
-                        gantt_data,
-                        colors={'Conflict': 'red', 'Preventive': '#00CC00', 'Corrective': '#FF9900', 
-                               'Renewal': '#FF0000', 'ERTMS Implementation': '#0066FF', 
-                               'Inspection': '#9900CC', 'Unknown': '#CCCCCC'},
-                        index_col='Type',
-                        title="Maintenance Schedule with Conflicts",
-                        show_colorbar=True,
-                        group_tasks=True,
-                        showgrid_x=True,
-                        showgrid_y=True
-                    )
-                    
-                    fig.update_layout(
-                        autosize=True,
-                        height=600,
-                        margin=dict(l=50, r=50, b=100, t=100)
+                    # Create a Gantt chart highlighting conflicts (cached until the
+                    # schedule or the set of conflicted measures changes)
+                    gantt_key = tuple(
+                        (f"{measure.get('track_id', 'Unknown')}: {measure.get('description', 'Unknown')}",
+                         measure.get('start_date', ''),
+                         measure.get('duration_days', 1),
+                         conflict_type_by_id.get(measure['id'], measure.get('type', 'Unknown')),
+                         measure.get('id', 'Unknown'))
+                        for measure in st.session_state.maintenance_data
                     )
+                    fig = build_conflict_gantt(gantt_key)
                     
                     # Show the chart
                     st.plotly_chart(fig, use_container_width=True)
@@ -2545,7 +3200,7 @@ elif app_mode == "Conflict Detection":
                     if len(conflicts) > 0:
                         with st.form("resolve_conflict_form"):
                             # Select conflict to resolve
-                            conflict_options = [f"Conflict {i+1}: {c['measure1'].get('description', 'Unknown')} vs {c['measure2'].get('description', 'Unknown')}" 
+                            conflict_options = [f"Conflict {i+1}: {c[1]} vs {c[4]}" 
                                              for i, c in enumerate(conflicts)]
                             
                             selected_conflict_idx = st.selectbox("Select conflict to resolve", 
@@ -2558,29 +3213,25 @@ elif app_mode == "Conflict Detection":
                             
                             # Action based on selected method
                             if resolution_method == "Adjust dates":
-                                conflict = conflicts[selected_conflict_idx]
-                                measure1 = conflict['measure1']
-                                measure2 = conflict['measure2']
+                                measure1, measure2, start1, start2 = conflict_refs[selected_conflict_idx]
                                 
                                 st.write(f"Measure 1: {measure1.get('description', 'Unknown')}")
                                 new_start1 = st.date_input("New start date for Measure 1", 
-                                                        value=conflict['start1'])
+                                                        value=start1)
                                 
                                 st.write(f"Measure 2: {measure2.get('description', 'Unknown')}")
                                 new_start2 = st.date_input("New start date for Measure 2", 
-                                                        value=conflict['start2'])
+                                                        value=start2)
                                 
                             elif resolution_method == "Allow parallelism":
-                                conflict = conflicts[selected_conflict_idx]
-                                type1 = conflict['measure1'].get('type', 'Unknown')
-                                type2 = conflict['measure2'].get('type', 'Unknown')
+                                measure1, measure2, _, _ = conflict_refs[selected_conflict_idx]
+                                type1 = measure1.get('type', 'Unknown')
+                                type2 = measure2.get('type', 'Unknown')
                                 
                                 st.write(f"Allow {type1} and {type2} activities to run in parallel")
                                 
                             elif resolution_method == "Cancel measure":
-                                conflict = conflicts[selected_conflict_idx]
-                                measure1 = conflict['measure1']
-                                measure2 = conflict['measure2']
+                                measure1, measure2, _, _ = conflict_refs[selected_conflict_idx]
                                 
                                 cancel_option = st.radio("Cancel which measure?", 
                                                       options=[f"Measure 1: {measure1.get('description', 'Unknown')}", 
@@ -2590,21 +3241,21 @@ elif app_mode == "Conflict Detection":
                             submit_button = st.form_submit_button("Apply Resolution")
                             
                             if submit_button:
-                                conflict = conflicts[selected_conflict_idx]
+                                measure1, measure2, _, _ = conflict_refs[selected_conflict_idx]
                                 if resolution_method == "Adjust dates":
                                     # Update the start dates in the maintenance data
                                     for i, measure in enumerate(st.session_state.maintenance_data):
-                                        if measure['id'] == conflict['measure1']['id']:
+                                        if measure['id'] == measure1['id']:
                                             st.session_state.maintenance_data[i]['start_date'] = new_start1.strftime(DATE_FORMAT)
-                                        elif measure['id'] == conflict['measure2']['id']:
+                                        elif measure['id'] == measure2['id']:
                                             st.session_state.maintenance_data[i]['start_date'] = new_start2.strftime(DATE_FORMAT)
                                     
                                     st.success("Start dates adjusted successfully!")
                                 
                                 elif resolution_method == "Allow parallelism":
                                     # Update the parallelism matrix
-                                    type1 = conflict['measure1'].get('type', 'Unknown')
-                                    type2 = conflict['measure2'].get('type', 'Unknown')
+                                    type1 = measure1.get('type', 'Unknown')
+                                    type2 = measure2.get('type', 'Unknown')
                                     
                                     if type1 not in st.session_state.parallelism_matrix:
                                         st.session_state.parallelism_matrix[type1] = {}
@@ -2619,9 +3270,9 @@ elif app_mode == "Conflict Detection":
                                 elif resolution_method == "Cancel measure":
                                     # Remove the selected measure
                                     if cancel_option.startswith("Measure 1"):
-                                        measure_to_remove = conflict['measure1']
+                                        measure_to_remove = measure1
                                     else:
-                                        measure_to_remove = conflict['measure2']
+                                        measure_to_remove = measure2
                                     
                                     # Filter out the measure
                                     st.session_state.maintenance_data = [m for m in st.session_state.maintenance_data 
@@ -2677,25 +3328,11 @@ elif app_mode == "Parallelism Matrix":
                 maintenance_types.append(t)
     
     # Initialize parallelism matrix if not already set for all types
-    for type1 in maintenance_types:
-        if type1 not in st.session_state.parallelism_matrix:
-            st.session_state.parallelism_matrix[type1] = {}
-        
-        for type2 in maintenance_types:
-            if type2 not in st.session_state.parallelism_matrix[type1]:
-                # Default to False (not parallel) for most combinations
-                can_parallel = False
-                
-                # Allow same type to be parallel by default (except Renewal)
-                if type1 == type2 and type1 != 'Renewal':
-                    can_parallel = True
-                
-                # Allow Preventive and Inspection to be parallel by default
-                if (type1 == 'Preventive' and type2 == 'Inspection') or \
-                   (type1 == 'Inspection' and type2 == 'Preventive'):
-                    can_parallel = True
-                
-                st.session_state.parallelism_matrix[type1][type2] = can_parallel
+    defaults = default_parallelism(tuple(sorted(maintenance_types, key=str)))
+    for type1, row in defaults.items():
+        existing = st.session_state.parallelism_matrix.setdefault(type1, {})
+        for type2, can_parallel in row.items():
+            existing.setdefault(type2, can_parallel)
     
     # Display the matrix as a form
     with st.form("parallelism_matrix_form"):
@@ -2718,12 +3355,15 @@ elif app_mode == "Parallelism Matrix":
                     # Show checkbox for each combination
                     if i >= j:  # Only show for the lower triangle + diagonal
                         checkbox_key = f"parallel_{type1}_{type2}"
-                        current_value = st.session_state.parallelism_matrix[type1][type2]
-                        st.session_state.parallelism_matrix[type1][type2] = st.checkbox(
-                            "", value=current_value, key=checkbox_key)
+                        row = st.session_state.parallelism_matrix[type1]
+                        mirror_row = st.session_state.parallelism_matrix[type2]
+                        value = st.checkbox("", value=row[type2], key=checkbox_key)
                         
-                        # Make sure the matrix is symmetric
-                        st.session_state.parallelism_matrix[type2][type1] = st.session_state.parallelism_matrix[type1][type2]
+                        # Store the cell and its mirror only when either differs,
+                        # which keeps the matrix symmetric without rewriting every cell
+                        if row[type2] != value or mirror_row[type1] != value:
+                            row[type2] = value
+                            mirror_row[type1] = value
         
         # Submit button
         submit_button = st.form_submit_button("Update Parallelism Configuration")
@@ -2783,17 +3423,10 @@ elif app_mode == "Parallelism Matrix":
             try:
                 uploaded_matrix = json.loads(uploaded_file.getvalue().decode('utf-8'))
                 
-                # Validate the uploaded matrix
-                valid = True
-                for type1 in maintenance_types:
-                    if type1 not in uploaded_matrix:
-                        valid = False
-                        break
-                    
-                    for type2 in maintenance_types:
-                        if type2 not in uploaded_matrix[type1]:
-                            valid = False
-                            break
+                # Validate the uploaded matrix: every type needs a row covering every type
+                required = set(maintenance_types)
+                valid = required.issubset(uploaded_matrix.keys()) and \
+                    all(required.issubset(uploaded_matrix[t]) for t in required)
                 
                 if valid:
                     st.session_state.parallelism_matrix = uploaded_matrix
@@ -2847,11 +3480,12 @@ elif app_mode == "Detour Routes":
             
             with col1:
                 # Select the track that will be closed
-                track_options = [link['id'] for link in st.session_state.network_data['links']]
+                track_options, _ = get_network_options()
                 closed_track = st.selectbox("Closed Track", options=track_options)
                 
                 # Find the from/to nodes for this track
-                selected_link = next((link for link in st.session_state.network_data['links'] if link['id'] == closed_track), None)
+                link_index = build_link_index(get_link_endpoints(st.session_state.network_data))
+                selected_link = st.session_state.network_data['links'][link_index[closed_track]] if closed_track in link_index else None
                 if selected_link:
                     st.info(f"Selected track: {closed_track} (from {selected_link['from_node']} to {selected_link['to_node']})")
             
@@ -2870,29 +3504,20 @@ elif app_mode == "Detour Routes":
                 # Manual detour path specification
                 if selected_link:
                     # Get all nodes
-                    node_options = [node['id'] for node in st.session_state.network_data['nodes']]
+                    _, node_options = get_network_options()
                     
                     # Default to from/to nodes
                     from_node = selected_link['from_node']
                     to_node = selected_link['to_node']
                     
-                    # Create columns for each node in path
                     st.write("Specify Detour Path (nodes):")
-                    detour_path = []
-                    
-                    # First node is fixed (from node)
-                    detour_path.append(from_node)
-                    
-                    # Allow specifying intermediate nodes (up to 5)
-                    for i in range(5):
-                        intermediate_node = st.selectbox(f"Intermediate Node {i+1}", 
-                                                     options=['None'] + node_options,
-                                                     key=f"node_{i}")
-                        if intermediate_node != 'None':
-                            detour_path.append(intermediate_node)
                     
-                    # Last node is fixed (to node)
-                    detour_path.append(to_node)
+                    # Intermediate nodes are picked in path order; the first and
+                    # last nodes are fixed to the closed track's from/to nodes
+                    intermediate_nodes = st.multiselect("Intermediate Nodes (in order)", 
+                                                        options=node_options,
+                                                        key="intermediate_nodes")
+                    detour_path = [from_node] + intermediate_nodes + [to_node]
                     
                     # Display the path
                     st.write(f"Detour Path: {' → '.join(detour_path)}")
@@ -2906,107 +3531,122 @@ elif app_mode == "Detour Routes":
                     
                     # Calculate detour if automatic
                     if use_automatic:
-                        # Create networkx graph
-                        G = nx.Graph()
-                        
-                        # Add all nodes
-                        for node in st.session_state.network_data['nodes']:
-                            G.add_node(node['id'])
+                        # Find the shortest path around the closed track (memoized per topology)
+                        detour = compute_detour(get_link_endpoints(st.session_state.network_data),
+                                                closed_track, from_node, to_node)
                         
-                        # Add all links except the closed one
-                        for link in st.session_state.network_data['links']:
-                            if link['id'] != closed_track:
-                                G.add_edge(link['from_node'], link['to_node'], id=link['id'])
-                        
-                        # Try to find shortest path
-                        try:
-                            detour_path = nx.shortest_path(G, from_node, to_node)
-                            
-                            # Convert node path to link path
-                            detour_links = []
-                            for i in range(len(detour_path) - 1):
-                                # Find the link ID
-                                for link in st.session_state.network_data['links']:
-                                    if (link['from_node'] == detour_path[i] and link['to_node'] == detour_path[i+1]) or \
-                                       (link['to_node'] == detour_path[i] and link['from_node'] == detour_path[i+1]):
-                                        detour_links.append(link['id'])
-                                        break
+                        if detour:
+                            detour_path, detour_links = detour
                             
                             # Store the detour route
-                            st.session_state.detour_routes[closed_track] = {
-                                'original_link': closed_track,
-                                'original_from': from_node,
-                                'original_to': to_node,
-                                'detour_links': detour_links,
-                                'detour_path': detour_path,
-                                'train_types': selected_train_types
-                            }
+                            st.session_state.detour_routes[closed_track] = DetourRoute(
+                                original_link=closed_track,
+                                original_from=from_node,
+                                original_to=to_node,
+                                detour_links=tuple(detour_links),
+                                detour_path=tuple(detour_path),
+                                train_types=tuple(selected_train_types)
+                            )
                             
                             st.success(f"Added detour route for {closed_track} using {len(detour_links)} links")
-                        except nx.NetworkXNoPath:
+                        else:
                             st.error(f"No alternative path found from {from_node} to {to_node}")
                     else:
                         # Use manually specified path
                         # Convert node path to link path
-                        detour_links = []
-                        for i in range(len(detour_path) - 1):
-                            # Find the link ID
-                            found_link = False
-                            for link in st.session_state.network_data['links']:
-                                if (link['from_node'] == detour_path[i] and link['to_node'] == detour_path[i+1]) or \
-                                   (link['to_node'] == detour_path[i] and link['from_node'] == detour_path[i+1]):
-                                    detour_links.append(link['id'])
-                                    found_link = True
-                                    break
-                            
-                            if not found_link:
-                                st.error(f"No link found between {detour_path[i]} and {detour_path[i+1]}")
-                                break
+                        edge_links = build_edge_links(get_link_endpoints(st.session_state.network_data))
+                        steps = list(zip(detour_path, detour_path[1:]))
+                        missing = next(((a, b) for a, b in steps if frozenset((a, b)) not in edge_links), None)
                         
-                        if len(detour_links) == len(detour_path) - 1:
+                        if missing:
+                            st.error(f"No link found between {missing[0]} and {missing[1]}")
+                        else:
+                            detour_links = [edge_links[frozenset((a, b))] for a, b in steps]
+                            
                             # Store the detour route
-                            st.session_state.detour_routes[closed_track] = {
-                                'original_link': closed_track,
-                                'original_from': from_node,
-                                'original_to': to_node,
-                                'detour_links': detour_links,
-                                'detour_path': detour_path,
-                                'train_types': selected_train_types
-                            }
+                            st.session_state.detour_routes[closed_track] = DetourRoute(
+                                original_link=closed_track,
+                                original_from=from_node,
+                                original_to=to_node,
+                                detour_links=tuple(detour_links),
+                                detour_path=tuple(detour_path),
+                                train_types=tuple(selected_train_types)
+                            )
                             
                             st.success(f"Added detour route for {closed_track} using {len(detour_links)} links")
         
+        # Add detour routes for several tracks at once
+        with st.form("add_bulk_detour_routes"):
+            st.subheader("Compute Detours for Selected Tracks")
+            
+            bulk_tracks = st.multiselect("Closed Tracks", options=track_options, key="bulk_closed_tracks")
+            bulk_train_types = st.multiselect("Train Types for Detours", options=train_type_options, default=['ALL'],
+                                              key="bulk_train_types")
+            st.caption("Tracks that start at the same node are treated as closed together.")
+            
+            bulk_submit_button = st.form_submit_button("Compute Detours")
+            
+            if bulk_submit_button and bulk_tracks:
+                link_index = build_link_index(get_link_endpoints(st.session_state.network_data))
+                closures = []
+                for track_id in bulk_tracks:
+                    link = st.session_state.network_data['links'][link_index[track_id]]
+                    closures.append((track_id, link['from_node'], link['to_node']))
+                
+                detours = compute_detours(get_link_endpoints(st.session_state.network_data), tuple(closures))
+                
+                added = 0
+                for track_id, from_node, to_node in closures:
+                    if detours[track_id]:
+                        detour_path, detour_links = detours[track_id]
+                        
+                        # Store the detour route
+                        st.session_state.detour_routes[track_id] = DetourRoute(
+                            original_link=track_id,
+                            original_from=from_node,
+                            original_to=to_node,
+                            detour_links=tuple(detour_links),
+                            detour_path=tuple(detour_path),
+                            train_types=tuple(bulk_train_types)
+                        )
+                        added += 1
+                    else:
+                        st.error(f"No alternative path found from {from_node} to {to_node}")
+                
+                if added:
+                    st.success(f"Added {added} detour routes")
+        
         # Display configured detour routes
         st.header("Configured Detour Routes")
         
         if st.session_state.detour_routes:
-            # Create tabs for list view and map view
-            list_tab, map_tab = st.tabs(["List View", "Map View"])
-            
-            with list_tab:
-                # Display detour routes as a table
-                detour_data = []
-                
-                for closed_track, route in st.session_state.detour_routes.items():
-                    detour_data.append({
-                        'Closed Track': closed_track,
-                        'From': route['original_from'],
-                        'To': route['original_to'],
-                        'Detour Path': ' → '.join(route['detour_path']),
-                        'Detour Links': ', '.join(route['detour_links']),
-                        'Train Types': ', '.join(route['train_types']),
-                        'Length': len(route['detour_links'])
-                    })
-                
-                detour_df = pd.DataFrame(detour_data)
+            # Switch between list view and map view; only the chosen view is built,
+            # so the map is not rendered while the list is shown
+            detour_view = st.radio("View", ["List View", "Map View"], horizontal=True,
+                                   key="detour_view", label_visibility="collapsed")
+            
+            if detour_view == "List View":
+                # Display detour routes as a table, built column by column
+                closed_tracks = list(st.session_state.detour_routes.keys())
+                routes = list(st.session_state.detour_routes.values())
+                
+                detour_df = pd.DataFrame({
+                    'Closed Track': closed_tracks,
+                    'From': [route.original_from for route in routes],
+                    'To': [route.original_to for route in routes],
+                    'Detour Path': [' → '.join(route.detour_path) for route in routes],
+                    'Detour Links': [', '.join(route.detour_links) for route in routes],
+                    'Train Types': [', '.join(route.train_types) for route in routes],
+                    'Length': [len(route.detour_links) for route in routes]
+                })
                 st.dataframe(detour_df)
                 st.markdown(download_dataframe_as_csv(detour_df, "detour_routes"), unsafe_allow_html=True)
                 
                 # Delete detour route
-                if detour_data:
+                if closed_tracks:
                     with st.form("delete_detour"):
                         route_to_delete = st.selectbox("Select Route to Delete", 
-                                                     options=[d['Closed Track'] for d in detour_data])
+                                                     options=closed_tracks)
                         
                         delete_button = st.form_submit_button("Delete Route")
                         
@@ -3015,110 +3655,22 @@ elif app_mode == "Detour Routes":
                             st.success(f"Deleted detour route for {route_to_delete}")
                             st.experimental_rerun()
             
-            with map_tab:
+            else:
                 # Create a map visualization of detour routes
                 if st.session_state.network_data:
-                    # Create a base map centered on Sweden
-                    m = folium.Map(location=[62, 15], zoom_start=5)
-                    
-                    # Create a dict to quickly look up nodes by ID
-                    node_dict = {n['id']: n for n in st.session_state.network_data['nodes']}
-                    
                     # Select a detour to visualize
                     selected_detour = st.selectbox(
                         "Select Detour to Visualize", 
                         options=list(st.session_state.detour_routes.keys())
                     )
                     
-                    # Add nodes to map
-                    for node in st.session_state.network_data['nodes']:
-                        if node.get('lat') and node.get('lon'):
-                            popup_text = f"""
-                            <b>{node.get('name', 'Unknown')}</b><br>
-                            ID: {node['id']}<br>
-                            """
-                            try:
-                                folium.CircleMarker(
-                                    location=[node['lat'], node['lon']],
-                                    radius=3,
-                                    color='blue',
-                                    fill=True,
-                                    fill_opacity=0.7,
-                                    popup=popup_text
-                                ).add_to(folium_map)
-                            except Exception as e:
-                                # Silently continue if map element can't be added
-                                pass
-                    
-                    # Add all links to map
-                    # Add all links to map
-                    for link in st.session_state.network_data['links']:
-                        from_node = node_dict.get(link['from_node'])
-                        to_node = node_dict.get(link['to_node'])
-                        
-                        if from_node and to_node and from_node.get('lat') and from_node.get('lon') and \
-                        to_node.get('lat') and to_node.get('lon'):
-                            
-                            # Determine color based on detour status
-                            if link['id'] == selected_detour:
-                                color = 'red'  # Closed link
-                                weight = 3
-                                opacity = 1.0
-                                dash_array = None
-                            elif selected_detour in st.session_state.detour_routes and \
-                                link['id'] in st.session_state.detour_routes[selected_detour]['detour_links']:
-                                color = 'green'  # Detour link
-                                weight = 3
-                                opacity = 1.0
-                                dash_array = '5, 5'
-                            else:
-                                color = 'blue'  # Regular link
-                                weight = 1
-                                opacity = 0.5
-                                dash_array = None
-                            
-                            # Create popup with link info
-                            popup_text = f"""
-                            <b>Link: {link['id']}</b><br>
-                            From: {from_node.get('name', from_node['id'])} to {to_node.get('name', to_node['id'])}<br>
-                            """
-                            
-                            # Add the link as a polyline with try-except
-                            try:
-                                folium.PolyLine(
-                                    locations=[[from_node['lat'], from_node['lon']], [to_node['lat'], to_node['lon']]],
-                                    color=color,
-                                    weight=weight,
-                                    opacity=opacity,
-                                    popup=popup_text,
-                                    dash_array=dash_array
-                                ).add_to(folium_map)
-                            except Exception as e:
-                                # Silently continue if map element can't be added
-                                pass
-                    
-                    # Add legend
-                    legend_html = '''
-                    <div style="position: fixed; bottom: 50px; left: 50px; z-index:1000; background-color: white; 
-                                padding: 10px; border: 1px solid grey; border-radius: 5px;">
-                        <p><b>Legend</b></p>
-                        <p><i style="background: blue; width: 10px; height: 10px; display: inline-block;"></i> Regular Track</p>
-                        <p><i style="background: red; width: 10px; height: 10px; display: inline-block;"></i> Closed Track</p>
-                        <p><i style="background: green; width: 10px; height: 10px; display: inline-block;
-                                    border-top: 1px dashed #000;"></i> Detour Route</p>
-                    </div>
-                    '''
-                    
-                    # Add legend safely
-                    root = folium_map.get_root()
-                    if hasattr(root, 'html') and hasattr(root.html, 'add_child'):
-                        root.html.add_child(folium.Element(legend_html))
-                    else:
-                        # Alternative approach if the expected structure isn't available
-                        folium_map.get_root().get_name()  # No-op to prevent error
-                    
-                    # Display the map
-                    folium_static(folium_map, width=1200, height=1000)
+                    # Display the map (rendered once per network and detour)
+                    route = st.session_state.detour_routes.get(selected_detour)
+                    detour_links = route.detour_links if route else ()
+                    map_html = build_detour_map(get_node_coords(st.session_state.network_data),
+                                                get_link_endpoints(st.session_state.network_data),
+                                                selected_detour, detour_links)
+                    components.html(map_html, width=1200, height=1000)
                     
                     # Display detour details
                     if selected_detour in st.session_state.detour_routes:
@@ -3127,42 +3679,23 @@ elif app_mode == "Detour Routes":
                         st.markdown(f"""
                         ### Detour Details for {selected_detour}
                         
-                        **Original Link:** {detour_info['original_link']} 
-                        (from {detour_info['original_from']} to {detour_info['original_to']})
+                        **Original Link:** {detour_info.original_link} 
+                        (from {detour_info.original_from} to {detour_info.original_to})
                         
-                        **Detour Path:** {' → '.join(detour_info['detour_path'])}
+                        **Detour Path:** {' → '.join(detour_info.detour_path)}
                         
-                        **Detour Links:** {', '.join(detour_info['detour_links'])}
+                        **Detour Links:** {', '.join(detour_info.detour_links)}
                         
-                        **Detour Length:** {len(detour_info['detour_links'])} links
+                        **Detour Length:** {len(detour_info.detour_links)} links
                         
-                        **Train Types:** {', '.join(detour_info['train_types'])}
+                        **Train Types:** {', '.join(detour_info.train_types)}
                         """)
         else:
             st.info("No detour routes configured yet. Add a route using the form above.")
         
         # Explain detour concepts
         with st.expander("Understanding Detour Routes"):
-            st.markdown("""
-            ### Detour Route Concepts
-            
-            Detour routes provide alternative paths for trains when a track is closed for maintenance.
-            
-            #### Key Components:
-            
-            1. **Closed Track** - The link that will be unavailable during maintenance
-            2. **Detour Path** - The series of nodes and links that form the alternative route
-            3. **Train Types** - Which types of trains can use this detour route
-            
-            #### Considerations for Detour Routes:
-            
-            - **Length** - Longer detours increase travel time and operational costs
-            - **Capacity** - Detour tracks must be able to handle the additional traffic
-            - **Electrification** - Some train types may require electrified tracks
-            - **Clearance** - Freight trains have specific clearance requirements
-            
-            The system can calculate optimal detours automatically or you can specify them manually.
-            """)
+            st.markdown(_DETOUR_HELP_MD)
 
 # Routing Rules page
 elif app_mode == "Routing Rules":
@@ -3210,7 +3743,7 @@ elif app_mode == "Routing Rules":
         
         if condition_type == "Track Closure":
             if st.session_state.network_data:
-                track_options = [link['id'] for link in st.session_state.network_data['links']]
+                track_options, _ = get_network_options()
                 selected_tracks = st.multiselect("Closed Tracks", options=track_options)
                 condition_details['tracks'] = selected_tracks
         
@@ -3232,7 +3765,7 @@ elif app_mode == "Routing Rules":
         
         elif condition_type == "Multiple Track Closure":
             if st.session_state.network_data:
-                track_options = [link['id'] for link in st.session_state.network_data['links']]
+                track_options, _ = get_network_options()
                 primary_track = st.selectbox("Primary Closed Track", options=track_options)
                 secondary_tracks = st.multiselect("Secondary Closed Tracks", options=track_options)
                 
@@ -3296,23 +3829,19 @@ elif app_mode == "Routing Rules":
     st.header("Configured Routing Rules")
     
     if st.session_state.routing_rules:
-        # Create table for rules
-        rules_data = []
+        # Create table for rules (cached until a rule is added or removed)
+        rules_by_id = {}
+        rules_rows = []
         
         for rule in st.session_state.routing_rules:
-            rules_data.append({
-                'ID': rule['id'],
-                'Name': rule['name'],
-                'Priority': rule['priority'],
-                'Condition': rule['condition_type'],
-                'Action': rule['action_type'],
-                'Description': rule['description']
-            })
+            rules_by_id.setdefault(rule['id'], rule)
+            rules_rows.append((rule['id'], rule['name'], rule['priority'],
+                               rule['condition_type'], rule['action_type'], rule['description']))
         
-        rules_df = pd.DataFrame(rules_data)
+        rules_df, sorted_rules_df = build_rules_tables(tuple(rules_rows))
         
         # Display rules sorted by priority
-        st.dataframe(rules_df.sort_values('Priority', ascending=False))
+        st.dataframe(sorted_rules_df)
         st.markdown(download_dataframe_as_csv(rules_df, "routing_rules"), unsafe_allow_html=True)
         
         # Rule details
@@ -3321,32 +3850,10 @@ elif app_mode == "Routing Rules":
         selected_rule_id = st.selectbox("Select Rule to View", options=[r['id'] for r in st.session_state.routing_rules])
         
         if selected_rule_id:
-            selected_rule = next((r for r in st.session_state.routing_rules if r['id'] == selected_rule_id), None)
+            selected_rule = rules_by_id.get(selected_rule_id)
             
             if selected_rule:
-                st.markdown(f"""
-                ### {selected_rule['name']}
-                
-                **Description:** {selected_rule['description']}
-                
-                **Priority:** {selected_rule['priority']}
-                
-                **Condition Type:** {selected_rule['condition_type']}
-                
-                **Condition Details:**
-                ```
-                {selected_rule['condition_details']}
-                ```
-                
-                **Action Type:** {selected_rule['action_type']}
-                
-                **Action Details:**
-                ```
-                {selected_rule['action_details']}
-                ```
-                
-                **Created:** {selected_rule['created_date']}
-                """)
+                st.markdown(render_rule_markdown(selected_rule))
                 
                 # Delete rule button
                 if st.button(f"Delete Rule: {selected_rule['name']}"):
@@ -3358,26 +3865,7 @@ elif app_mode == "Routing Rules":
     
     # Explain routing rules
     with st.expander("Understanding Routing Rules"):
-        st.markdown("""
-        ### Routing Rules Concepts
-        
-        Routing rules define how traffic should be managed during track closures and other restrictions.
-        
-        #### Rule Components:
-        
-        1. **Condition** - When the rule should be applied (track closure, train type, time period)
-        2. **Action** - What should happen when the condition is met (use detour, cancel service, etc.)
-        3. **Priority** - Higher priority rules are applied first when multiple rules match
-        
-        #### Common Rule Types:
-        
-        - **Track Closure Rules** - Specify detours when specific tracks are closed
-        - **Train Type Rules** - Apply different actions for different train types
-        - **Time Period Rules** - Apply special routing during specific periods
-        - **Multiple Track Rules** - Handle complex scenarios with multiple closures
-        
-        The routing rules work together with detour routes to maintain accessibility during maintenance.
-        """)
+        st.markdown(_RULES_HELP_MD)
 
 # Optimization page
 elif app_mode == "Optimization":
@@ -3515,55 +4003,8 @@ elif app_mode == "Optimization":
                     
                     start_time = time.time()
                     
-                    # Use subprocess.Popen to get output in real-time
-                    process = subprocess.Popen(
-                        cmd,
-                        stdout=subprocess.PIPE,
-                        stderr=subprocess.STDOUT,
-                        universal_newlines=True,
-                        bufsize=1
-                    )
-                    
-                    # Collect all output
-                    all_output = []
-                    last_progress = 0
-                    
-                    # Process output in real-time
-                    for line in iter(process.stdout.readline, ''):
-                        all_output.append(line)
-                        log_output.code(''.join(all_output))
-                        
-                        # Update progress bar based on output
-                        if "Loading problem" in line:
-                            progress_bar.progress(10)
-                            status_text.text("Loading problem data...")
-                        elif "Building models" in line:
-                            progress_bar.progress(20)
-                            status_text.text("Building optimization models...")
-                        elif "Solving scheduling model" in line:
-                            progress_bar.progress(30)
-                            status_text.text("Solving scheduling model...")
-                        elif "Iteration" in line:
-                            # Extract iteration number
-                            try:
-                                iteration = int(line.split("Iteration")[1].strip().split("...")[0])
-                                progress = min(80, 30 + 10 * iteration)
-                                progress_bar.progress(progress)
-                                status_text.text(f"Optimization iteration {iteration}...")
-                            except:
-                                pass
-                        elif "Scheduling model solved successfully" in line:
-                            progress_bar.progress(60)
-                            status_text.text("Scheduling model solved. Processing traffic...")
-                        elif "Traffic flow model solved successfully" in line:
-                            progress_bar.progress(80)
-                            status_text.text("Traffic model solved. Finalizing results...")
-                        elif "Results written to" in line:
-                            progress_bar.progress(100)
-                            status_text.text("Optimization completed successfully!")
-                    
-                    # Get return code
-                    return_code = process.wait()
+                    # Stream the solver output while it runs
+                    return_code = asyncio.run(run_solver(cmd, progress_bar, status_text, log_output))
                     
                     # Calculate elapsed time
                     elapsed_time = time.time() - start_time
@@ -3579,13 +4020,15 @@ elif app_mode == "Optimization":
                         try:
                             # Load schedule results
                             schedule_file = os.path.join(output_dir, 'schedule_results.xml')
-                            if os.path.exists(schedule_file):
-                                schedule_tree = ET.parse(schedule_file)
-                                schedule_root = schedule_tree.getroot()
-                                
+                            try:
+                                schedule = load_schedule_results(schedule_file, os.path.getmtime(schedule_file))
+                            except FileNotFoundError:
+                                schedule = None
+                            
+                            if schedule is not None:
                                 # Extract basic stats
-                                objective = float(schedule_root.find('.//objective').text)
-                                cancelled_projects = len(schedule_root.findall('.//cancelled/project'))
+                                objective = schedule['objective']
+                                cancelled_projects = schedule['cancelled_projects']
                                 
                                 # Store results in session state
                                 st.session_state.optimization_result = {
@@ -3597,14 +4040,20 @@ elif app_mode == "Optimization":
                                 
                                 # Try to parse traffic results
                                 traffic_file = os.path.join(output_dir, 'traffic_results.xml')
-                                if os.path.exists(traffic_file):
-                                    traffic_tree = ET.parse(traffic_file)
-                                    traffic_root = traffic_tree.getroot()
-                                    
-                                    # Extract traffic impact
-                                    cancelled = float(traffic_root.find('.//summary/cancelled').text or 0)
-                                    delayed = float(traffic_root.find('.//summary/delayed').text or 0)
-                                    diverted = float(traffic_root.find('.//summary/diverted').text or 0)
+                                try:
+                                    traffic_root = ET.parse(traffic_file).getroot()
+                                except FileNotFoundError:
+                                    traffic_root = None
+                                
+                                if traffic_root is not None:
+                                    # Extract traffic impact, walking the tree once for all summary values
+                                    # (the first of each tag wins, as with find)
+                                    summary = {}
+                                    for summary_elem in traffic_root.iterfind('.//summary/*'):
+                                        summary.setdefault(summary_elem.tag, summary_elem.text)
+                                    cancelled = float(summary['cancelled'] or 0)
+                                    delayed = float(summary['delayed'] or 0)
+                                    diverted = float(summary['diverted'] or 0)
                                     
                                     st.session_state.optimization_result['traffic_impact'] = {
                                         'cancelled': cancelled,
@@ -3614,33 +4063,17 @@ elif app_mode == "Optimization":
                                     }
                                 
                                 # Update maintenance data with optimized schedule
-                                schedule_elems = schedule_root.findall('.//schedule/project')
-                                
-                                if schedule_elems:
-                                    optimized_schedule = []
+                                if schedule['instances']:
+                                    # Index measures by id once (first occurrence wins, as with a scan)
+                                    measure_index = {}
+                                    for i, measure in enumerate(st.session_state.maintenance_data):
+                                        measure_index.setdefault(measure.get('id'), i)
                                     
-                                    for proj_elem in schedule_elems:
-                                        proj_id = proj_elem.get('id')
-                                        proj_desc = proj_elem.get('desc')
-                                        
-                                        for task_elem in proj_elem.findall('task'):
-                                            task_id = task_elem.get('id')
-                                            task_desc = task_elem.get('desc')
-                                            duration = float(task_elem.get('duration', 0))
-                                            
-                                            for inst_elem in task_elem.findall('instance'):
-                                                index = int(inst_elem.get('index', 0))
-                                                start = datetime.strptime(inst_elem.get('start'), "%Y-%m-%d %H:%M:%S")
-                                                end = datetime.strptime(inst_elem.get('end'), "%Y-%m-%d %H:%M:%S")
-                                                
-                                                # Find the corresponding measure in our data
-                                                measure_id = f"{proj_id}_{task_id}_{index}"
-                                                
-                                                # Update the start date
-                                                for i, measure in enumerate(st.session_state.maintenance_data):
-                                                    if measure.get('id') == measure_id:
-                                                        st.session_state.maintenance_data[i]['start_date'] = start.strftime(DATE_FORMAT)
-                                                        break
+                                    for measure_id, start, end in schedule['instances']:
+                                        # Update the start date of the corresponding measure in our data
+                                        i = measure_index.get(measure_id)
+                                        if i is not None:
+                                            st.session_state.maintenance_data[i]['start_date'] = start.strftime(DATE_FORMAT)
                                 
                                 # Display results summary
                                 st.subheader("Optimization Results Summary")
@@ -3699,43 +4132,12 @@ elif app_mode == "Optimization":
             # Visualize optimized schedule
             st.subheader("Optimized Maintenance Schedule")
             
-            # Create Gantt chart of optimized schedule
-            gantt_data = []
-            
-            for measure in st.session_state.maintenance_data:
-                # Parse dates
-                start_date_str = measure.get('start_date', '')
-                start_date_obj = parse_date(start_date_str)
-                
-                if start_date_obj:
-                    # Calculate end date
-                    duration_days = measure.get('duration_days', 1)
-                    end_date_obj = start_date_obj + timedelta(days=duration_days)
-                    
-                    # Determine color based on type
-                    color = get_maintenance_color(measure.get('type', 'Unknown'))
-                    
-                    # Add to Gantt data
-                    gantt_data.append({
-                        'Task': f"{measure.get('track_id', 'Unknown')}: {measure.get('description', 'Unknown')}",
-                        'Start': start_date_obj,
-                        'Finish': end_date_obj,
-                        'Type': measure.get('type', 'Unknown'),
-                        'ID': measure.get('id', 'Unknown'),
-                        'Color': color
-                    })
-            
-            # Create Gantt chart
-            fig = ff.create_gantt(
-                gantt_data,
-                colors={measure_type: get_maintenance_color(measure_type) for measure_type in set(m.get('type', 'Unknown') for m in st.session_state.maintenance_data)},
-                index_col='Type',
-                title="Optimized Maintenance Schedule",
-                show_colorbar=True,
-                group_tasks=True,
-                showgrid_x=True,
-                showgrid_y=True
-            )
+            # Create Gantt chart of optimized schedule (cached until the schedule changes)
+            gantt_key = tuple((f"{m.get('track_id', 'Unknown')}: {m.get('description', 'Unknown')}",
+                               m.get('start_date', ''), m.get('duration_days', 1),
+                               m.get('type', 'Unknown'), m.get('id', 'Unknown'))
+                              for m in st.session_state.maintenance_data)
+            fig = build_optimized_gantt(gantt_key)
             
             # Add today line
             today = datetime.now().date()
@@ -3750,12 +4152,6 @@ elif app_mode == "Optimization":
                 yref='paper'
             )
             
-            fig.update_layout(
-                autosize=True,
-                height=600,
-                margin=dict(l=50, r=50, b=100, t=100)
-            )
-            
             st.plotly_chart(fig, use_container_width=True)
             
             # Traffic impact visualization
@@ -3790,29 +4186,15 @@ elif app_mode == "Optimization":
                 if 'traffic_file' in st.session_state.optimization_result['traffic_impact']:
                     try:
                         traffic_file = st.session_state.optimization_result['traffic_impact']['traffic_file']
-                        traffic_tree = ET.parse(traffic_file)
-                        traffic_root = traffic_tree.getroot()
                         
-                        # Extract traffic flows
-                        flows = []
-                        for flow_elem in traffic_root.findall('.//flow'):
-                            line = flow_elem.get('line')
-                            route = flow_elem.get('route', 'normal')
-                            period = int(flow_elem.get('period', 0))
-                            value = float(flow_elem.get('value', 0))
-                            
-                            flows.append({
-                                'Line': line,
-                                'Route': route,
-                                'Period': period,
-                                'Value': value
-                            })
+                        # Extract traffic flows (cached until the results file changes)
+                        flows_df = load_traffic_flows(traffic_file, os.path.getmtime(traffic_file))
                         
-                        if flows:
-                            flows_df = pd.DataFrame(flows)
+                        if not flows_df.empty:
+                            flows_df = flows_df[['Line', 'Route', 'Period', 'Value']]
                             
                             # Group by route type
-                            route_summary = flows_df.groupby('Route')['Value'].sum().reset_index()
+                            route_summary = flows_df.groupby('Route', observed=True)['Value'].sum().reset_index()
                             
                             # Create bar chart
                             fig = px.bar(
@@ -3841,53 +4223,54 @@ elif app_mode == "Optimization":
             # Show conflict resolution results
             st.subheader("Conflict Resolution Results")
             
-            # Run conflict detection on optimized schedule
-            measures_by_track = {}
-            for measure in st.session_state.maintenance_data:
-                track_id = measure.get('track_id')
-                if track_id:
-                    if track_id not in measures_by_track:
-                        measures_by_track[track_id] = []
-                    measures_by_track[track_id].append(measure)
+            # Run conflict detection on optimized schedule in one vectorized pass:
+            # measures are sorted by track (in order of first appearance) and start day,
+            # and each one is paired with the later measures on its track that start
+            # on or before its end
+            tracked = [m for m in st.session_state.maintenance_data if m.get('track_id')]
+            track_codes, _ = pd.factorize(pd.Series([m['track_id'] for m in tracked], dtype=object))
+            starts = [parse_date(m.get('start_date', '')) for m in tracked]
+            dated = np.array([k for k, start in enumerate(starts) if start], dtype=np.int64)
+            
+            # Parallelism matrix as a boolean array plus a type -> row index map
+            type_index, parallel = build_parallel_table(st.session_state.parallelism_matrix)
             
             # Check for conflicts
             conflicts = []
             
-            for track_id, measures in measures_by_track.items():
-                # Sort measures by start date
-                sorted_measures = sorted(measures, key=lambda m: parse_date(m.get('start_date', '')) or datetime.min)
-                
-                # Check for overlaps
-                for i in range(len(sorted_measures)):
-                    measure1 = sorted_measures[i]
-                    start1 = parse_date(measure1.get('start_date', ''))
-                    if start1:
-                        duration1 = measure1.get('duration_days', 1)
-                        end1 = start1 + timedelta(days=duration1)
-                        
-                        for j in range(i + 1, len(sorted_measures)):
-                            measure2 = sorted_measures[j]
-                            start2 = parse_date(measure2.get('start_date', ''))
-                            if start2:
-                                # Check for overlap
-                                if start2 <= end1:
-                                    # Check if these types can be parallel
-                                    type1 = measure1.get('type', 'Unknown')
-                                    type2 = measure2.get('type', 'Unknown')
-                                    
-                                    # Check parallelism matrix
-                                    can_be_parallel = False
-                                    if type1 in st.session_state.parallelism_matrix and \
-                                       type2 in st.session_state.parallelism_matrix[type1]:
-                                        can_be_parallel = st.session_state.parallelism_matrix[type1][type2]
-                                    
-                                    if not can_be_parallel:
-                                        # Add to conflicts
-                                        conflicts.append({
-                                            'track_id': track_id,
-                                            'measure1': measure1,
-                                            'measure2': measure2
-                                        })
+            if len(dated):
+                start_ord = np.array([starts[k].toordinal() for k in dated], dtype=np.int64)
+                end_ord = start_ord + np.array([tracked[k].get('duration_days', 1) for k in dated])
+                codes = track_codes[dated]
+                
+                # Stable sort, so measures starting on the same day keep their data order
+                order = np.lexsort((start_ord, codes))
+                dated, codes = dated[order], codes[order]
+                start_ord, end_ord = start_ord[order] - start_ord.min(), end_ord[order] - start_ord.min()
+                
+                # Offset each track by more than any day span, so one binary search on
+                # the combined key finds the last overlapping measure on the same track
+                span = max(start_ord.max(), end_ord.max()) + 1
+                keys = codes * span + start_ord
+                first = np.arange(len(dated))
+                last = np.maximum(np.searchsorted(keys, codes * span + end_ord, side='right'), first + 1)
+                
+                # Expand every (measure, later overlapping measure) pair in loop order
+                counts = last - first - 1
+                pair1 = np.repeat(first, counts)
+                pair2 = pair1 + 1 + np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+                
+                # Keep the pairs whose types cannot be parallel
+                type_ids = np.array([type_index.get(tracked[k].get('type', 'Unknown'), -1) for k in dated],
+                                    dtype=np.int64)
+                incompatible = ~parallel[type_ids[pair1], type_ids[pair2]]
+                for a, b in zip(dated[pair1[incompatible]], dated[pair2[incompatible]]):
+                    # Add to conflicts
+                    conflicts.append({
+                        'track_id': tracked[a]['track_id'],
+                        'measure1': tracked[a],
+                        'measure2': tracked[b]
+                    })
             
             # Show conflict results
             if conflicts:
@@ -3931,83 +4314,74 @@ elif app_mode == "Optimization":
 elif app_mode == "Reports":
     st.title("Reports & Analysis")
     
-    # Create tabs for different report types
-    schedule_tab, traffic_tab, cost_tab, annual_tab = st.tabs([
-        "Schedule Analysis", "Traffic Impact Analysis", "Cost Analysis", "Annual Planning"
-    ])
+    if st.session_state.maintenance_data:
+        # Maintenance records as one frame with the start dates parsed, shared by the
+        # report tabs (cached until the maintenance data changes)
+        maintenance_df = build_maintenance_frame(tuple(
+            (m.get('track_id', 'Unknown'), m.get('description', 'Unknown'), m.get('type'),
+             m.get('start_date', ''), m.get('duration_days', 1), m.get('responsible_unit', 'Unknown'),
+             m.get('estimated_cost'))
+            for m in st.session_state.maintenance_data
+        ))
+        
+        # One type -> color map for every type in the data, shared by the report charts
+        report_colors = get_maintenance_color_map(tuple(maintenance_df['type'].fillna('Unknown').unique()))
+    else:
+        # No maintenance data yet; each tab shows its own warning
+        maintenance_df, report_colors = None, None
     
-    # Schedule Analysis tab
-    with schedule_tab:
+    # Each report tab is a fragment, so a widget change reruns only the tab it is on
+    @st.fragment
+    def schedule_report(maintenance_df, report_colors):
+        """Schedule Analysis tab: timeline, activity distribution, outages and the activity list"""
         st.header("Maintenance Schedule Analysis")
         
         if not st.session_state.maintenance_data:
             st.warning("No maintenance data available. Please go to Data Management to load or generate maintenance data.")
         else:
+            # Start years, track ids and filter options (cached until dates or tracks change)
+            measures = st.session_state.maintenance_data
+            start_years, track_ids, year_options, track_options = build_schedule_filters(
+                tuple((m.get('start_date', ''), m.get('track_id')) for m in measures))
+            
             # Filter options
             col1, col2 = st.columns(2)
             
             with col1:
-                year_filter = st.selectbox(
-                    "Year", 
-                    options=['All'] + sorted(list(set([parse_date(m.get('start_date', '')).year 
-                                               for m in st.session_state.maintenance_data 
-                                               if parse_date(m.get('start_date', ''))])))
-                )
+                year_filter = st.selectbox("Year", options=['All'] + year_options)
             
             with col2:
-                track_filter = st.selectbox(
-                    "Track", 
-                    options=['All'] + sorted(list(set([m.get('track_id') 
-                                               for m in st.session_state.maintenance_data 
-                                               if m.get('track_id')])))
-                )
+                track_filter = st.selectbox("Track", options=['All'] + track_options)
             
-            # Filter data
-            filtered_data = st.session_state.maintenance_data
+            # Filter data with boolean masks over the start years and tracks;
+            # measures without a start date never match a year
+            mask = np.ones(len(measures), dtype=bool)
             
             if year_filter != 'All':
-                filtered_data = [m for m in filtered_data if parse_date(m.get('start_date', '')).year == year_filter]
+                mask &= start_years == year_filter
             
             if track_filter != 'All':
-                filtered_data = [m for m in filtered_data if m.get('track_id') == track_filter]
+                mask &= track_ids == track_filter
             
-            if filtered_data:
+            schedule_df = maintenance_df[mask]
+            
+            if not schedule_df.empty:
                 # Schedule timeline
                 st.subheader("Maintenance Timeline")
                 
-                # Create dataframe for timeline chart
-                timeline_data = []
-                
-                for measure in filtered_data:
-                    start_date = parse_date(measure.get('start_date', ''))
-                    if start_date:
-                        duration = measure.get('duration_days', 1)
-                        end_date = start_date + timedelta(days=duration)
-                        
-                        timeline_data.append({
-                            'Task': f"{measure.get('track_id', 'Unknown')}: {measure.get('description', 'Unknown')}",
-                            'Start': start_date,
-                            'Finish': end_date,
-                            'Track': measure.get('track_id', 'Unknown'),
-                            'Type': measure.get('type', 'Unknown'),
-                            'Duration': duration
-                        })
+                # Timeline rows for the dated measures, built column by column
+                dated_df = schedule_df.dropna(subset=['start_date'])
+                timeline_df = pd.DataFrame({
+                    'Task': dated_df['track_id'].astype(str) + ': ' + dated_df['description'].astype(str),
+                    'Start': dated_df['start_date'],
+                    'Finish': dated_df['start_date'] + pd.to_timedelta(dated_df['duration_days'], unit='D'),
+                    'Track': dated_df['track_id'],
+                    'Type': dated_df['type'].fillna('Unknown'),
+                    'Duration': dated_df['duration_days']
+                })
                 
                 # Create Gantt chart
-                fig = ff.create_gantt(
-                    timeline_data,
-                    colors={mtype: get_maintenance_color(mtype) for mtype in set(m['Type'] for m in timeline_data)},
-                    index_col='Track',
-                    title="Maintenance Timeline",
-                    show_colorbar=True,
-                    group_tasks=True
-                )
-                
-                fig.update_layout(
-                    autosize=True,
-                    height=600,
-                    margin=dict(l=50, r=50, b=100, t=100)
-                )
+                fig = build_report_timeline(timeline_df)
                 
                 st.plotly_chart(fig, use_container_width=True)
                 
@@ -4015,35 +4389,32 @@ elif app_mode == "Reports":
                 st.subheader("Maintenance Activity Distribution")
                 
                 # Create dataframe for activity counts
-                activity_data = []
-                
-                for measure in filtered_data:
-                    activity_data.append({
-                        'Track': measure.get('track_id', 'Unknown'),
-                        'Type': measure.get('type', 'Unknown'),
-                        'Duration': measure.get('duration_days', 1),
-                        'Month': parse_date(measure.get('start_date', '')).strftime('%Y-%m') if parse_date(measure.get('start_date', '')) else 'Unknown'
-                    })
-                
-                activity_df = pd.DataFrame(activity_data)
+                activity_df = pd.DataFrame({
+                    'Track': schedule_df['track_id'],
+                    'Type': schedule_df['type'].fillna('Unknown'),
+                    'Duration': schedule_df['duration_days'],
+                    'Month': schedule_df['month_str'].fillna('Unknown')
+                }).reset_index(drop=True).astype({'Track': 'category', 'Type': 'category', 'Month': 'category'})
                 
                 # Activity count by type
-                fig = px.bar(
-                    activity_df.groupby('Type').size().reset_index(name='Count'),
+                fig = build_report_figure(
+                    'bar',
+                    activity_df.groupby('Type', observed=True).size().reset_index(name='Count'),
                     x='Type',
                     y='Count',
                     title="Maintenance Activities by Type",
                     color='Type',
-                    color_discrete_map={mtype: get_maintenance_color(mtype) for mtype in activity_df['Type'].unique()}
+                    color_discrete_map=report_colors
                 )
                 
                 st.plotly_chart(fig, use_container_width=True)
                 
                 # Activity count by month
-                monthly_counts = activity_df.groupby('Month').size().reset_index(name='Count')
+                monthly_counts = activity_df.groupby('Month', observed=True).size().reset_index(name='Count')
                 monthly_counts = monthly_counts.sort_values('Month')
                 
-                fig = px.line(
+                fig = build_report_figure(
+                    'line',
                     monthly_counts,
                     x='Month',
                     y='Count',
@@ -4057,10 +4428,11 @@ elif app_mode == "Reports":
                 st.subheader("Track Outage Analysis")
                 
                 # Calculate total outage days by track
-                outage_df = activity_df.groupby('Track')['Duration'].sum().reset_index()
+                outage_df = activity_df.groupby('Track', observed=True)['Duration'].sum().reset_index()
                 outage_df = outage_df.sort_values('Duration', ascending=False)
                 
-                fig = px.bar(
+                fig = build_report_figure(
+                    'bar',
                     outage_df,
                     x='Track',
                     y='Duration',
@@ -4074,26 +4446,16 @@ elif app_mode == "Reports":
                 # Detailed activity list
                 st.subheader("Detailed Activity List")
                 
-                # Create dataframe for detailed list
-                detail_data = []
-                
-                for measure in filtered_data:
-                    start_date = parse_date(measure.get('start_date', ''))
-                    if start_date:
-                        duration = measure.get('duration_days', 1)
-                        end_date = start_date + timedelta(days=duration)
-                        
-                        detail_data.append({
-                            'Track': measure.get('track_id', 'Unknown'),
-                            'Description': measure.get('description', 'Unknown'),
-                            'Type': measure.get('type', 'Unknown'),
-                            'Start Date': start_date.strftime('%Y-%m-%d'),
-                            'End Date': end_date.strftime('%Y-%m-%d'),
-                            'Duration (days)': duration,
-                            'Responsible Unit': measure.get('responsible_unit', 'Unknown')
-                        })
-                
-                detail_df = pd.DataFrame(detail_data)
+                # Create dataframe for detailed list from the timeline rows
+                detail_df = pd.DataFrame({
+                    'Track': dated_df['track_id'],
+                    'Description': dated_df['description'],
+                    'Type': timeline_df['Type'],
+                    'Start Date': timeline_df['Start'].dt.strftime('%Y-%m-%d'),
+                    'End Date': timeline_df['Finish'].dt.strftime('%Y-%m-%d'),
+                    'Duration (days)': dated_df['duration_days'],
+                    'Responsible Unit': dated_df['responsible_unit']
+                }).reset_index(drop=True)
                 detail_df = detail_df.sort_values('Start Date')
                 
                 st.dataframe(detail_df)
@@ -4102,15 +4464,16 @@ elif app_mode == "Reports":
                 # Export options
                 st.download_button(
                     label="Export Full Report",
-                    data=detail_df.to_csv(index=False),
+                    data=dataframe_to_csv(detail_df),
                     file_name="maintenance_schedule_report.csv",
                     mime="text/csv"
                 )
             else:
                 st.info("No maintenance activities match the selected filters.")
     
-    # Traffic Impact Analysis tab
-    with traffic_tab:
+    @st.fragment
+    def traffic_report():
+        """Traffic Impact Analysis tab: impact summary, impact by track and over time"""
         st.header("Traffic Impact Analysis")
         
         if not st.session_state.traffic_data:
@@ -4130,31 +4493,29 @@ elif app_mode == "Reports":
                 {'Category': 'Diverted', 'Count': impact['diverted']}
             ])
             
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                # Summary metrics
-                st.metric("Total Trains Affected", f"{impact['cancelled'] + impact['delayed'] + impact['diverted']:.0f}")
-                st.metric("Cancelled Trains", f"{impact['cancelled']:.0f}")
-                st.metric("Delayed Trains", f"{impact['delayed']:.0f}")
-                st.metric("Diverted Trains", f"{impact['diverted']:.0f}")
+            # Summary metrics in a single row
+            col1, col2, col3, col4 = st.columns(4)
+            col1.metric("Total Trains Affected", f"{impact['cancelled'] + impact['delayed'] + impact['diverted']:.0f}")
+            col2.metric("Cancelled Trains", f"{impact['cancelled']:.0f}")
+            col3.metric("Delayed Trains", f"{impact['delayed']:.0f}")
+            col4.metric("Diverted Trains", f"{impact['diverted']:.0f}")
+            
+            # Pie chart
+            fig = build_report_figure(
+                'pie',
+                impact_data, 
+                values='Count', 
+                names='Category', 
+                title='Traffic Impact Distribution',
+                color='Category',
+                color_discrete_map={
+                    'Cancelled': 'red',
+                    'Delayed': 'orange',
+                    'Diverted': 'yellow'
+                }
+            )
             
-            with col2:
-                # Pie chart
-                fig = px.pie(
-                    impact_data, 
-                    values='Count', 
-                    names='Category', 
-                    title='Traffic Impact Distribution',
-                    color='Category',
-                    color_discrete_map={
-                        'Cancelled': 'red',
-                        'Delayed': 'orange',
-                        'Diverted': 'yellow'
-                    }
-                )
-                
-                st.plotly_chart(fig, use_container_width=True)
+            st.plotly_chart(fig, use_container_width=True)
             
             # Show traffic impact by track
             st.subheader("Traffic Impact by Track")
@@ -4163,38 +4524,20 @@ elif app_mode == "Reports":
             if 'traffic_file' in impact:
                 try:
                     traffic_file = impact['traffic_file']
-                    traffic_tree = ET.parse(traffic_file)
-                    traffic_root = traffic_tree.getroot()
                     
-                    # Extract traffic flows
-                    flows = []
-                    for flow_elem in traffic_root.findall('.//flow'):
-                        line = flow_elem.get('line')
-                        route = flow_elem.get('route', 'normal')
-                        period = int(flow_elem.get('period', 0))
-                        link = flow_elem.get('link', '')
-                        value = float(flow_elem.get('value', 0))
-                        
-                        flows.append({
-                            'Line': line,
-                            'Route': route,
-                            'Period': period,
-                            'Link': link,
-                            'Value': value
-                        })
+                    # Extract traffic flows (cached until the results file changes)
+                    flows_df = load_traffic_flows(traffic_file, os.path.getmtime(traffic_file))
                     
-                    if flows:
-                        flows_df = pd.DataFrame(flows)
-                        
-                        # Group by link and route type
-                        if 'Link' in flows_df.columns and flows_df['Link'].any():
-                            link_impact = flows_df.groupby(['Link', 'Route'])['Value'].sum().reset_index()
-                            
-                            # Filter to only affected links
-                            link_impact = link_impact[link_impact['Route'] != 'normal']
+                    if not flows_df.empty:
+                        # Group the affected (not normally routed) flows by link and route type;
+                        # filtering first keeps the normal flows out of the groupby
+                        if 'Link' in flows_df.columns and flows_df['Link'].ne('').any():
+                            affected_flows = flows_df[flows_df['Route'] != 'normal']
+                            link_impact = affected_flows.groupby(['Link', 'Route'], observed=True)['Value'].sum().reset_index()
                             
                             if not link_impact.empty:
-                                fig = px.bar(
+                                fig = build_report_figure(
+                                    'bar',
                                     link_impact,
                                     x='Link',
                                     y='Value',
@@ -4222,26 +4565,11 @@ elif app_mode == "Reports":
             # Show traffic impact over time
             st.subheader("Traffic Impact Over Time")
             
-            # Generate synthetic data for visualization if needed
-            periods = 10
-            
-            impact_by_period = pd.DataFrame({
-                'Period': list(range(periods)),
-                'Cancelled': np.random.randint(0, 20, periods),
-                'Delayed': np.random.randint(10, 30, periods),
-                'Diverted': np.random.randint(5, 25, periods)
-            })
-            
-            # Reshape for stacked area chart
-            impact_long = pd.melt(
-                impact_by_period, 
-                id_vars=['Period'], 
-                value_vars=['Cancelled', 'Delayed', 'Diverted'],
-                var_name='Impact Type', 
-                value_name='Count'
-            )
+            # Synthetic per-period data for visualization, stable for the same impact totals
+            impact_long = build_synthetic_impact(impact['cancelled'], impact['delayed'], impact['diverted'])
             
-            fig = px.area(
+            fig = build_report_figure(
+                'area',
                 impact_long,
                 x='Period',
                 y='Count',
@@ -4260,98 +4588,95 @@ elif app_mode == "Reports":
             # Export data
             st.download_button(
                 label="Export Traffic Impact Data",
-                data=impact_long.to_csv(index=False),
+                data=dataframe_to_csv(impact_long),
                 file_name="traffic_impact_data.csv",
                 mime="text/csv"
             )
     
-    # Cost Analysis tab
-    with cost_tab:
+    @st.fragment
+    def cost_report(maintenance_df, report_colors):
+        """Cost Analysis tab: cost totals by type, track and period, and the cost table"""
         st.header("Maintenance Cost Analysis")
         
         if not st.session_state.maintenance_data:
             st.warning("No maintenance data available. Please go to Data Management to load or generate maintenance data.")
         else:
             # Check if cost data is available
-            has_cost_data = any('estimated_cost' in m for m in st.session_state.maintenance_data)
+            has_cost_data = maintenance_df['estimated_cost'].notna().any()
             
             if not has_cost_data:
                 st.warning("No cost data available in the maintenance dataset.")
             else:
-                # Filter options
+                # Filter options from the parsed years and the named types
+                year_options = sorted(maintenance_df['year'].dropna().astype(int).unique().tolist())
+                type_options = sorted(t for t in maintenance_df['type'].dropna().unique().tolist() if t)
+                
                 col1, col2 = st.columns(2)
                 
                 with col1:
-                    year_filter = st.selectbox(
-                        "Year", 
-                        options=['All'] + sorted(list(set([parse_date(m.get('start_date', '')).year 
-                                                   for m in st.session_state.maintenance_data 
-                                                   if parse_date(m.get('start_date', ''))])))
-                    )
+                    # Keyed, since it would otherwise clash with the schedule tab's "Year" filter
+                    year_filter = st.selectbox("Year", options=['All'] + year_options, key="cost_year_filter")
                 
                 with col2:
-                    type_filter = st.selectbox(
-                        "Maintenance Type", 
-                        options=['All'] + sorted(list(set([m.get('type', 'Unknown') 
-                                                   for m in st.session_state.maintenance_data 
-                                                   if m.get('type')])))
-                    )
+                    type_filter = st.selectbox("Maintenance Type", options=['All'] + type_options)
                 
-                # Filter data
-                filtered_data = st.session_state.maintenance_data
+                # Filter the cached frame with boolean masks; measures without a
+                # start date never match a year
+                filtered_df = maintenance_df
                 
                 if year_filter != 'All':
-                    filtered_data = [m for m in filtered_data if parse_date(m.get('start_date', '')).year == year_filter]
+                    filtered_df = filtered_df[filtered_df['year'] == year_filter]
                 
                 if type_filter != 'All':
-                    filtered_data = [m for m in filtered_data if m.get('type') == type_filter]
-                
-                # Cost analysis
-                cost_data = []
+                    filtered_df = filtered_df[filtered_df['type'] == type_filter]
                 
-                for measure in filtered_data:
-                    if 'estimated_cost' in measure and measure['estimated_cost'] is not None:
-                        start_date = parse_date(measure.get('start_date', ''))
-                        if start_date:
-                            cost_data.append({
-                                'Track': measure.get('track_id', 'Unknown'),
-                                'Type': measure.get('type', 'Unknown'),
-                                'Description': measure.get('description', 'Unknown'),
-                                'Month': start_date.strftime('%Y-%m'),
-                                'Quarter': f"Q{(start_date.month-1)//3 + 1} {start_date.year}",
-                                'Year': start_date.year,
-                                'Cost': measure['estimated_cost'],
-                                'Responsible Unit': measure.get('responsible_unit', 'Unknown')
-                            })
-                
-                if cost_data:
-                    cost_df = pd.DataFrame(cost_data)
+                # Nothing to analyse when the filters match no measures
+                if filtered_df.empty:
+                    st.info("No cost data available for the selected filters.")
+                    return
+                
+                # Cost analysis over the dated measures with a cost estimate
+                costed_df = filtered_df.dropna(subset=['start_date', 'estimated_cost'])
+                cost_df = pd.DataFrame({
+                    'Track': costed_df['track_id'],
+                    'Type': costed_df['type'].fillna('Unknown'),
+                    'Description': costed_df['description'],
+                    'Month': costed_df['month_str'],
+                    'Quarter': costed_df['quarter'],
+                    'Cost': costed_df['estimated_cost'].infer_objects(),
+                    'Responsible Unit': costed_df['responsible_unit']
+                }).reset_index(drop=True).astype({
+                    'Track': 'category', 'Type': 'category', 'Month': 'category',
+                    'Quarter': 'category', 'Responsible Unit': 'category'
+                })
+                
+                if not cost_df.empty:
+                    # Costs summed once per type, track, month and quarter; the per-type,
+                    # per-track and timeline totals below are rolled up from these groups
+                    cost_groups = cost_df.groupby(['Type', 'Track', 'Month', 'Quarter'], observed=True, dropna=False)['Cost'].sum()
                     
                     # Total cost summary
                     total_cost = cost_df['Cost'].sum()
                     avg_cost = cost_df['Cost'].mean()
                     
                     col1, col2 = st.columns(2)
-                    
-                    with col1:
-                        st.metric("Total Cost", f"{total_cost:,.0f} SEK")
-                    
-                    with col2:
-                        st.metric("Average Cost per Activity", f"{avg_cost:,.0f} SEK")
+                    col1.metric("Total Cost", f"{total_cost:,.0f} SEK")
+                    col2.metric("Average Cost per Activity", f"{avg_cost:,.0f} SEK")
                     
                     # Cost by type
                     st.subheader("Cost by Maintenance Type")
                     
-                    type_cost = cost_df.groupby('Type')['Cost'].sum().reset_index()
+                    type_cost = cost_groups.groupby(level='Type', observed=True).sum().reset_index()
                     type_cost = type_cost.sort_values('Cost', ascending=False)
                     
-                    fig = px.bar(
+                    fig = build_report_figure(
+                        'bar',
                         type_cost,
                         x='Type',
                         y='Cost',
                         title='Total Cost by Maintenance Type',
                         color='Type',
-                        color_discrete_map={mtype: get_maintenance_color(mtype) for mtype in type_cost['Type'].unique()}
+                        color_discrete_map=report_colors
                     )
                     
                     st.plotly_chart(fig, use_container_width=True)
@@ -4359,10 +4684,11 @@ elif app_mode == "Reports":
                     # Cost by track
                     st.subheader("Cost by Track")
                     
-                    track_cost = cost_df.groupby('Track')['Cost'].sum().reset_index()
+                    track_cost = cost_groups.groupby(level='Track', observed=True).sum().reset_index()
                     track_cost = track_cost.sort_values('Cost', ascending=False)
                     
-                    fig = px.bar(
+                    fig = build_report_figure(
+                        'bar',
                         track_cost,
                         x='Track',
                         y='Cost',
@@ -4383,15 +4709,16 @@ elif app_mode == "Reports":
                     else:
                         time_group = 'Quarter'
                     
-                    time_cost = cost_df.groupby([time_group, 'Type'])['Cost'].sum().reset_index()
+                    time_cost = cost_groups.groupby(level=[time_group, 'Type'], observed=True).sum().reset_index()
                     
-                    fig = px.bar(
+                    fig = build_report_figure(
+                        'bar',
                         time_cost,
                         x=time_group,
                         y='Cost',
                         color='Type',
                         title=f'Cost by {time_group}',
-                        color_discrete_map={mtype: get_maintenance_color(mtype) for mtype in time_cost['Type'].unique()},
+                        color_discrete_map=report_colors,
                         barmode='stack'
                     )
                     
@@ -4408,17 +4735,16 @@ elif app_mode == "Reports":
                 else:
                     st.info("No cost data available for the selected filters.")
     
-    # Annual Planning tab
-    with annual_tab:
+    @st.fragment
+    def annual_report(maintenance_df):
+        """Annual Planning tab: activity calendar, monthly workload and recommendations"""
         st.header("Annual Maintenance Planning")
         
         if not st.session_state.maintenance_data:
             st.warning("No maintenance data available. Please go to Data Management to load or generate maintenance data.")
         else:
             # Year selection
-            available_years = sorted(list(set([parse_date(m.get('start_date', '')).year 
-                                     for m in st.session_state.maintenance_data 
-                                     if parse_date(m.get('start_date', ''))])))
+            available_years = sorted(maintenance_df['year'].dropna().astype(int).unique().tolist())
             
             if not available_years:
                 st.warning("No valid dates found in maintenance data.")
@@ -4426,55 +4752,28 @@ elif app_mode == "Reports":
                 selected_year = st.selectbox("Select Year for Planning", options=available_years, index=0)
                 
                 # Filter data for selected year
-                year_data = [m for m in st.session_state.maintenance_data 
-                           if parse_date(m.get('start_date', '')) and 
-                           parse_date(m.get('start_date', '')).year == selected_year]
+                year_df = maintenance_df[maintenance_df['year'] == selected_year]
                 
-                if year_data:
+                if not year_df.empty:
                     # Annual calendar view
                     st.subheader(f"Maintenance Calendar for {selected_year}")
                     
-                    # Create calendar data
-                    calendar_data = []
-                    months = range(1, 13)
-                    
-                    for month in months:
-                        month_str = f"{selected_year}-{month:02d}"
-                        month_activities = [m for m in year_data 
-                                          if parse_date(m.get('start_date', '')).strftime('%Y-%m') == month_str]
-                        
-                        # Count by type
-                        type_counts = {}
-                        for m in month_activities:
-                            mtype = m.get('type', 'Unknown')
-                            if mtype not in type_counts:
-                                type_counts[mtype] = 0
-                            type_counts[mtype] += 1
-                        
-                        # Add to calendar data
-                        for mtype, count in type_counts.items():
-                            calendar_data.append({
-                                'Month': month_str,
-                                'Type': mtype,
-                                'Count': count
-                            })
+                    # Count the year's activities per type and month in one pass
+                    pivot_df = pd.crosstab(
+                        year_df['type'].fillna('Unknown'),
+                        year_df['month_str'],
+                        rownames=['Type'],
+                        colnames=['Month']
+                    )
                     
-                    if calendar_data:
-                        calendar_df = pd.DataFrame(calendar_data)
-                        
+                    if not pivot_df.empty:
                         # Create heatmap calendar
-                        pivot_df = calendar_df.pivot_table(
-                            values='Count',
-                            index='Type',
-                            columns='Month',
-                            fill_value=0
-                        )
-                        
-                        fig = px.imshow(
+                        fig = build_report_figure(
+                            'imshow',
                             pivot_df,
                             labels=dict(x="Month", y="Maintenance Type", color="Count"),
-                            x=pivot_df.columns,
-                            y=pivot_df.index,
+                            x=pivot_df.columns.tolist(),
+                            y=pivot_df.index.tolist(),
                             color_continuous_scale="Blues",
                             title=f"Maintenance Activity Calendar {selected_year}",
                             height=400
@@ -4485,28 +4784,20 @@ elif app_mode == "Reports":
                     # Annual workload analysis
                     st.subheader("Annual Workload Analysis")
                     
-                    workload_data = []
-                    for m in year_data:
-                        start_date = parse_date(m.get('start_date', ''))
-                        if start_date:
-                            month = start_date.month
-                            workload_data.append({
-                                'Month': month,
-                                'Month Name': start_date.strftime('%B'),
-                                'Type': m.get('type', 'Unknown'),
-                                'Duration': m.get('duration_days', 1),
-                                'Track': m.get('track_id', 'Unknown'),
-                                'Unit': m.get('responsible_unit', 'Unknown')
-                            })
+                    # Workload rows from the parsed start dates of the year's measures
+                    workload_df = pd.DataFrame({
+                        'Month': year_df['start_date'].dt.month,
+                        'Month Name': year_df['start_date'].dt.strftime('%B'),
+                        'Duration': year_df['duration_days']
+                    })
                     
-                    if workload_data:
-                        workload_df = pd.DataFrame(workload_data)
-                        
+                    if not workload_df.empty:
                         # Monthly workload
                         monthly_work = workload_df.groupby(['Month', 'Month Name'])['Duration'].sum().reset_index()
                         monthly_work = monthly_work.sort_values('Month')
                         
-                        fig = px.bar(
+                        fig = build_report_figure(
+                            'bar',
                             monthly_work,
                             x='Month Name',
                             y='Duration',
@@ -4521,15 +4812,12 @@ elif app_mode == "Reports":
                         st.subheader("Planning Recommendations")
                         
                         # Find peak months and low-activity months
-                        monthly_sum = monthly_work.set_index('Month')['Duration'].to_dict()
                         avg_workload = monthly_work['Duration'].mean()
                         
-                        # Identify peaks and valleys
-                        peak_months = [m for m, v in monthly_sum.items() if v > avg_workload * 1.25]
-                        low_months = [m for m, v in monthly_sum.items() if v < avg_workload * 0.75]
-                        
-                        peak_names = [datetime(2000, m, 1).strftime('%B') for m in peak_months]
-                        low_names = [datetime(2000, m, 1).strftime('%B') for m in low_months]
+                        # Identify peaks and valleys with boolean masks over the monthly totals,
+                        # which are already in month order and carry the month names
+                        peak_names = monthly_work.loc[monthly_work['Duration'] > avg_workload * 1.25, 'Month Name'].tolist()
+                        low_names = monthly_work.loc[monthly_work['Duration'] < avg_workload * 0.75, 'Month Name'].tolist()
                         
                         st.info(f"""
                         ### Workload Distribution Recommendations
@@ -4545,6 +4833,27 @@ elif app_mode == "Reports":
                         """)
                 else:
                     st.info(f"No maintenance activities found for {selected_year}.")
+    
+    # Create tabs for different report types
+    schedule_tab, traffic_tab, cost_tab, annual_tab = st.tabs([
+        "Schedule Analysis", "Traffic Impact Analysis", "Cost Analysis", "Annual Planning"
+    ])
+    
+    # Schedule Analysis tab
+    with schedule_tab:
+        schedule_report(maintenance_df, report_colors)
+    
+    # Traffic Impact Analysis tab
+    with traffic_tab:
+        traffic_report()
+    
+    # Cost Analysis tab
+    with cost_tab:
+        cost_report(maintenance_df, report_colors)
+    
+    # Annual Planning tab
+    with annual_tab:
+        annual_report(maintenance_df)
 
 if __name__ == "__main__":
 
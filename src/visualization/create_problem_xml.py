@@ -1,13 +1,40 @@
 # create_problem_xml.py (updated for encoding issues)
 import os
-import xml.etree.ElementTree as ET
-from xml.dom import minidom
+from pathlib import Path
 import logging
 import sys
 import chardet
 import unicodedata
 import re
 import itertools
+from functools import lru_cache
+
+# Prefer lxml (C bindings over libxml2) and fall back to the standard library
+try:
+    from lxml import etree as ET
+    HAS_LXML = True
+except ImportError:
+    import xml.etree.ElementTree as ET
+    HAS_LXML = False
+
+# Swedish and special character replacements, applied in a single pass
+_SWEDISH_TABLE = str.maketrans({
+    'å': 'a', 'ä': 'a', 'ö': 'o',
+    'Å': 'A', 'Ä': 'A', 'Ö': 'O',
+    'é': 'e', 'è': 'e', 'ê': 'e',
+    'É': 'E', 'È': 'E', 'Ê': 'E',
+    'ü': 'u', 'Ü': 'U',
+    'ø': 'o', 'Ø': 'O',
+    'æ': 'ae', 'Æ': 'AE'
+})
+
+# ASCII names made of words separated by single spaces are already normalized
+_SAFE_ASCII_RE = re.compile(r'\A[\w-]+(?: [\w-]+)*\Z')
+_NON_WORD_RE = re.compile(r'[^\w\s-]')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+# Attributes holding names that normalize_xml_element normalizes
+_NAME_ATTRS = frozenset(['name', 'desc', 'description', 'id', 'from', 'to', 'line', 'link', 'project', 'task', 'node'])
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -44,26 +71,21 @@ def validate_and_complete_network(network_root, traffic_root):
     existing_link_ids = set(link.get('id') for link in existing_links.findall('link'))
     existing_node_ids = set(node.get('id') for node in existing_nodes.findall('node'))
     
-    # Collect links from different sources in traffic
-    additional_links = []
+    # Collect links referenced by the traffic that are missing from the
+    # network, keeping the order in which they are first seen
+    additional_links = {}
     
     # Check line routes
-    line_routes = traffic_root.findall('.//line_route')
-    if line_routes:
-        for route in line_routes:
-            route_links = route.get('route', '').split()
-            additional_links.extend(route_links)
+    for route in traffic_root.iterfind('.//line_route'):
+        for link_id in route.get('route', '').split():
+            if link_id not in existing_link_ids:
+                additional_links[link_id] = None
     
     # Check traffic blocking
-    blocking_links = traffic_root.findall('.//traffic_blocking')
-    if blocking_links:
-        for block in blocking_links:
-            link_id = block.get('link')
-            if link_id:
-                additional_links.append(link_id)
-    
-    # Remove duplicates and filter out existing links
-    additional_links = list(set(additional_links) - existing_link_ids)
+    for block in traffic_root.iterfind('.//traffic_blocking'):
+        link_id = block.get('link')
+        if link_id and link_id not in existing_link_ids:
+            additional_links[link_id] = None
     
     # Add missing links
     for link_id in additional_links:
@@ -99,6 +121,7 @@ def validate_and_complete_network(network_root, traffic_root):
     return network_root
 
 
+@lru_cache(maxsize=65536)
 def normalize_name(name):
     """
     Normalize names by handling Swedish and special characters.
@@ -116,20 +139,12 @@ def normalize_name(name):
     if not isinstance(name, str):
         return name
     
-    # Comprehensive Swedish character mapping
-    swedish_char_map = {
-        'å': 'a', 'ä': 'a', 'ö': 'o',
-        'Å': 'A', 'Ä': 'A', 'Ö': 'O',
-        'é': 'e', 'è': 'e', 'ê': 'e',
-        'É': 'E', 'È': 'E', 'Ê': 'E',
-        'ü': 'u', 'Ü': 'U',
-        'ø': 'o', 'Ø': 'O',
-        'æ': 'ae', 'Æ': 'AE'
-    }
+    # Skip the Unicode cleanup for names that would come out unchanged
+    if name.isascii() and _SAFE_ASCII_RE.match(name):
+        return name
     
     # First, replace known Swedish characters
-    for swe_char, replacement in swedish_char_map.items():
-        name = name.replace(swe_char, replacement)
+    name = name.translate(_SWEDISH_TABLE)
     
     # Remove any remaining diacritical marks
     normalized = ''.join(
@@ -138,10 +153,10 @@ def normalize_name(name):
     )
     
     # Remove any remaining non-alphanumeric characters except underscores
-    normalized = re.sub(r'[^\w\s-]', '', normalized)
+    normalized = _NON_WORD_RE.sub('', normalized)
     
     # Replace multiple spaces with a single space
-    normalized = re.sub(r'\s+', ' ', normalized).strip()
+    normalized = _WHITESPACE_RE.sub(' ', normalized).strip()
     
     # If empty after normalization, use a default
     if not normalized:
@@ -151,24 +166,94 @@ def normalize_name(name):
 
 def normalize_xml_element(element):
     """
-    Recursively normalize names in XML elements.
+    Normalize names in an XML element and all of its descendants.
     
     Parameters:
     -----------
     element : xml.etree.ElementTree.Element
         The XML element to normalize
     """
-    # Normalize name-related attributes
-    name_attrs = ['name', 'desc', 'description', 'id', 'from', 'to', 'line', 'link', 'project', 'task', 'node']
+    # Walk the subtree with iter() rather than recursing per child
+    for elem in element.iter():
+        # Normalize the name-related attributes present on this element
+        for attr in _NAME_ATTRS.intersection(elem.attrib):
+            elem.attrib[attr] = normalize_name(elem.attrib[attr])
+
+def stream_xml_file(file_path, encoding, keep_tags, chunk_size=65536):
+    """
+    Parse an XML file incrementally with a pull parser.
     
-    for attr in name_attrs:
-        if attr in element.attrib:
-            # Normalize the attribute while preserving its original structure
-            element.attrib[attr] = normalize_name(element.attrib[attr])
+    The file is fed to the parser in chunks rather than read into a single
+    string first; only the leading chunk, which holds the prolog and root
+    tag, goes through clean_xml_content. Elements outside the kept subtrees
+    are cleared as soon as they are complete.
+    
+    Parameters:
+    -----------
+    file_path : str
+        Path to the XML file
+    encoding : str
+        Encoding used to read the file
+    keep_tags : tuple
+        Tags of the elements that are merged into the problem
+    chunk_size : int
+        Number of characters fed to the parser at a time
+    
+    Returns:
+    --------
+    Element
+        Root element of the parsed file
+    """
+    if HAS_LXML:
+        # recover lets libxml2 absorb malformed content; blank text is dropped
+        # so that the merged tree can be pretty printed on output
+        parser = ET.XMLPullParser(events=('start', 'end'), remove_blank_text=True, recover=True)
+    else:
+        parser = ET.XMLPullParser(events=('start', 'end'))
+    
+    # One flag per open element, set when a kept element lies beneath it
+    open_elements = []
+    kept_depth = 0
+    root = None
+    
+    def handle_events():
+        nonlocal kept_depth, root
+        for event, elem in parser.read_events():
+            if event == 'start':
+                if root is None:
+                    root = elem
+                if elem.tag in keep_tags:
+                    kept_depth += 1
+                    open_elements[:] = [True] * len(open_elements)
+                open_elements.append(False)
+            else:
+                contains_kept = open_elements.pop()
+                if elem.tag in keep_tags:
+                    kept_depth -= 1
+                elif not kept_depth and not contains_kept and open_elements:
+                    elem.clear()
+    
+    with open(file_path, 'r', encoding=encoding) as f:
+        head = clean_xml_content(f.read(chunk_size))
+        
+        # clean_xml_content closes a wrapping <root> element itself, so hold
+        # the closing tag back until the rest of the file has been fed
+        wrapped = head.startswith('<root>') and head.endswith('</root>')
+        if wrapped:
+            head = head[:-len('</root>')]
+        
+        parser.feed(head)
+        handle_events()
+        for chunk in iter(lambda: f.read(chunk_size), ''):
+            parser.feed(chunk)
+            handle_events()
+        
+        if wrapped:
+            parser.feed('</root>')
     
-    # Recursively process child elements
-    for child in element:
-        normalize_xml_element(child)
+    parser.close()
+    handle_events()
+    return root
 
 def create_problem_xml(network_file=None, traffic_file=None, projects_file=None, output_file=None):
     """
@@ -214,16 +299,8 @@ def create_problem_xml(network_file=None, traffic_file=None, projects_file=None,
             encoding = detect_encoding(network_file)
             logger.info(f"Detected encoding for {network_file}: {encoding}")
             
-            # Read the XML file with detected encoding
-            with open(network_file, 'r', encoding=encoding) as f:
-                network_content = f.read()
-            
-            # Clean the content
-            network_content = clean_xml_content(network_content)
-            
-            # Parse the cleaned content
-            
-            network_root = ET.fromstring(network_content)
+            # Stream the XML file with detected encoding
+            network_root = stream_xml_file(network_file, encoding, keep_tags=('network',))
             
             normalize_xml_element(network_root)
             
@@ -237,6 +314,9 @@ def create_problem_xml(network_file=None, traffic_file=None, projects_file=None,
                 network_elem = network_root.find('.//network')
                 if network_elem is not None:
                     root.append(network_elem)
+                    # lxml moves the element out of its wrapper, so keep a
+                    # reference to the merged element for link validation
+                    network_root = network_elem
                     logger.info(f"Successfully merged network data from {network_file}")
                     success_count += 1
                 else:
@@ -261,15 +341,8 @@ def create_problem_xml(network_file=None, traffic_file=None, projects_file=None,
             encoding = detect_encoding(traffic_file)
             logger.info(f"Detected encoding for {traffic_file}: {encoding}")
             
-            # Read the XML file with detected encoding
-            with open(traffic_file, 'r', encoding=encoding) as f:
-                traffic_content = f.read()
-            
-            # Clean the content
-            traffic_content = clean_xml_content(traffic_content)
-            
-            # Parse the cleaned content
-            traffic_root = ET.fromstring(traffic_content)
+            # Stream the XML file with detected encoding
+            traffic_root = stream_xml_file(traffic_file, encoding, keep_tags=('traffic',))
 
             normalize_xml_element(traffic_root)
             
@@ -283,6 +356,9 @@ def create_problem_xml(network_file=None, traffic_file=None, projects_file=None,
                 traffic_elem = traffic_root.find('.//traffic')
                 if traffic_elem is not None:
                     root.append(traffic_elem)
+                    # lxml moves the element out of its wrapper, so keep a
+                    # reference to the merged element for link validation
+                    traffic_root = traffic_elem
                     logger.info(f"Successfully merged traffic data from {traffic_file}")
                     success_count += 1
                 else:
@@ -315,15 +391,8 @@ def create_problem_xml(network_file=None, traffic_file=None, projects_file=None,
             encoding = detect_encoding(projects_file)
             logger.info(f"Detected encoding for {projects_file}: {encoding}")
             
-            # Read the XML file with detected encoding
-            with open(projects_file, 'r', encoding=encoding) as f:
-                projects_content = f.read()
-            
-            # Clean the content
-            projects_content = clean_xml_content(projects_content)
-            
-            # Parse the cleaned content
-            projects_root = ET.fromstring(projects_content)
+            # Stream the XML file with detected encoding
+            projects_root = stream_xml_file(projects_file, encoding, keep_tags=('resources', 'projects'))
 
             normalize_xml_element(projects_root)
             
@@ -410,17 +479,16 @@ def create_problem_xml(network_file=None, traffic_file=None, projects_file=None,
     
     # Create XML string and prettify it
     try:
-        rough_string = ET.tostring(root, 'utf-8')
-        reparsed = minidom.parseString(rough_string)
-        pretty_xml = reparsed.toprettyxml(indent="  ")
-        
-        # Remove empty lines (common in minidom output)
-        lines = [line for line in pretty_xml.split('\n') if line.strip()]
-        pretty_xml = '\n'.join(lines)
-        
-        # Save to file
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(pretty_xml)
+        if HAS_LXML:
+            # lxml pretty prints in a single C-level pass
+            pretty_xml = ET.tostring(root, pretty_print=True, xml_declaration=True, encoding='utf-8')
+            
+            # Save to file
+            Path(output_file).write_bytes(pretty_xml)
+        else:
+            # Indent the tree in place and serialize it straight to the file
+            ET.indent(root, space="  ")
+            ET.ElementTree(root).write(output_file, encoding='utf-8', xml_declaration=True)
         
         logger.info(f"Problem XML created and saved to {output_file}")
         
@@ -435,7 +503,13 @@ def create_problem_xml(network_file=None, traffic_file=None, projects_file=None,
         return False
 
 def detect_encoding(file_path):
-    """Detect file encoding using chardet"""
+    """Detect file encoding using chardet, cached per file version"""
+    stat = os.stat(file_path)
+    return _detect_encoding(file_path, stat.st_mtime_ns, stat.st_size)
+
+@lru_cache(maxsize=32)
+def _detect_encoding(file_path, mtime_ns, size):
+    """Detect the encoding of a file; mtime_ns and size key the cache"""
     # Read a sample of the file
     with open(file_path, 'rb') as f:
         sample = f.read(10000)  # Read first 10000 bytes
@@ -446,11 +520,10 @@ def detect_encoding(file_path):
     
     # Use common fallbacks if detection failed or returned None
     if not encoding or encoding.lower() == 'ascii':
-        # Try these encodings in order
+        # Try these encodings in order on the sample already read
         for enc in ['latin-1', 'iso-8859-1', 'cp1252', 'utf-8']:
             try:
-                with open(file_path, 'r', encoding=enc) as f:
-                    f.read(100)  # Try to read a bit
+                sample.decode(enc)
                 return enc
             except UnicodeDecodeError:
                 continue
@@ -476,7 +549,7 @@ def clean_xml_content(content):
     """
     # Remove XML declaration if present
     if content.startswith('<?xml'):
-        content = content[content.find('?>') + 2:].strip()
+        content = content[content.find('?>') + 2:].lstrip()
     
     # Remove any DOCTYPE declarations
     if '<!DOCTYPE' in content:
@@ -0,0 +1,33 @@
+import os
+import sys
+from datetime import datetime
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'visualization'))
+
+from app import parse_dates  # noqa: E402
+
+
+def test_parse_dates_only_datetime_values():
+    dates = [datetime(2024, 1, 1), datetime(2024, 3, 15)]
+
+    parsed = parse_dates(dates)
+
+    assert parsed.tolist() == [pd.Timestamp(2024, 1, 1), pd.Timestamp(2024, 3, 15)]
+
+
+def test_parse_dates_only_none_values():
+    parsed = parse_dates([None, None])
+
+    assert len(parsed) == 2
+    assert parsed.isna().all()
+
+
+def test_parse_dates_mixed_values():
+    dates = ['2024-05-06 10:00:00', '2024-05-07T08:00', datetime(2024, 1, 1), None, 'not a date']
+
+    parsed = parse_dates(dates)
+
+    assert parsed.tolist()[:3] == [pd.Timestamp(2024, 5, 6), pd.Timestamp(2024, 5, 7), pd.Timestamp(2024, 1, 1)]
+    assert parsed[3:].isna().all()